@@ -0,0 +1,144 @@
+"""
+Checks and times the neighbor search broadphases in framework.spatial against the original all-pairs loop from
+World._calc_collisions(), which measured plain (non-wrapped) distances, and then over the ticks of a recorded match
+(where VerletList gets to reuse its pairs, and SweepAndPrune its order, from one tick to the next).
+
+Run from the repository root with:  python -m benchmarks.neighbors
+"""
+import random
+import time
+from framework import match, spatial, values
+from framework.team import Team
+from framework.world import World
+from controllers.boidy import BoidyController
+from controllers.state import StateController
+from support.euclid import Vector2
+
+WIDTH, HEIGHT = 800, 600
+SIZES = [50, 200, 800, 1600]
+REPEATS = 3
+MATCH_TICKS = 300
+
+def legacy_pairs(points, radius):
+    # the original O(n^2) loop: every ordered pair, a Vector2 per pair, planar distances only
+    found = []
+    for i, (x, y) in enumerate(points):
+        for j, (ox, oy) in enumerate(points):
+            if i == j: continue
+            dist = Vector2(x - ox, y - oy).magnitude()
+            if dist <= radius and i < j:
+                found.append((i, j, dist))
+    return found
+
+def uniform(n, rng):
+    return [(rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT)) for i in xrange(n)]
+
+def clustered(n, rng, flocks=4, spread=values.VISION_RADIUS):
+    # a few flocks, some of them straddling the world's edges
+    centers = [(rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT)) for i in xrange(flocks)]
+    points = []
+    for i in xrange(n):
+        cx, cy = centers[i % flocks]
+        points.append(((cx + rng.gauss(0, spread)) % WIDTH, (cy + rng.gauss(0, spread)) % HEIGHT))
+    return points
+
+def packed(n, rng):
+    # flocks as tightly packed as flocking controllers pack them, a handful of grid cells each
+    return clustered(n, rng, spread=values.COLLISION_DIST * 2)
+
+def recorded_match(per_team, seed):
+    # everyone's (x, y) at every tick of a headless match between a flocking team and a fighting one
+    world = World(WIDTH, HEIGHT, headless=True, seed=seed)
+    match.populate(world, [Team("flock", BoidyController()), Team("fight", StateController(1))], per_team)
+    ticks = []
+    for tick in xrange(MATCH_TICKS):
+        ticks.append([(me.x, me.y) for me in world.ents if not me.dead])
+        world.update()
+        world.integrate(values.SIM_DT)
+    return ticks
+
+def replay_pairs(broadphase, ticks, radius):
+    return [broadphase.pairs(points, radius) for points in ticks]
+
+def best_time(fn, *args):
+    best = None
+    for i in xrange(REPEATS):
+        start = time.time()
+        result = fn(*args)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def check(reference, candidate):
+    # both must report the same pairs with the same distances
+    ref = dict(((i, j), dist) for i, j, dx, dy, dist in reference)
+    got = dict(((i, j), dist) for i, j, dx, dy, dist in candidate)
+    if set(ref) != set(got):
+        return "MISMATCH (%d vs %d pairs)" % (len(ref), len(got))
+    if any(abs(ref[k] - got[k]) > 1e-9 for k in ref):
+        return "MISMATCH (distances)"
+    return "ok"
+
+def check_all(references, candidates):
+    # check() for every tick of a match
+    results = set(check(reference, candidate) for reference, candidate in zip(references, candidates))
+    return "ok" if results == set(["ok"]) else "MISMATCH"
+
+def main():
+    rng = random.Random(275)
+    radius = values.VISION_RADIUS
+
+    print "%-10s %6s %10s %10s %10s %10s %10s %8s %8s %8s %8s %8s" % (
+        "layout", "n", "legacy(s)", "brute(s)", "hash(s)", "sap(s)", "quad(s)", "speedup", "seam", "hash", "sap", "quad")
+    for layout in (uniform, clustered, packed):
+        for n in SIZES:
+            points = layout(n, rng)
+
+            legacy_time, legacy = best_time(legacy_pairs, points, radius)
+            brute_time, brute = best_time(spatial.BruteForce(WIDTH, HEIGHT).pairs, points, radius)
+            hash_time, hashed = best_time(spatial.SpatialHash(WIDTH, HEIGHT).pairs, points, radius)
+            sap_time, swept = best_time(spatial.SweepAndPrune(WIDTH, HEIGHT).pairs, points, radius)
+            quad_time, quadded = best_time(spatial.QuadTree(WIDTH, HEIGHT).pairs, points, radius)
+
+            # "seam" is how many pairs the planar loop missed because they're only close across an edge
+            print "%-10s %6d %10.4f %10.4f %10.4f %10.4f %10.4f %7.1fx %8d %8s %8s %8s" % (
+                layout.__name__, n, legacy_time, brute_time, hash_time, sap_time, quad_time,
+                legacy_time/max(hash_time, 1e-9), len(brute) - len(legacy),
+                check(brute, hashed), check(brute, swept), check(brute, quadded))
+
+    # at the collision distance, the grid's cells (as wide as the vision radius) hold far more birds than are
+    # anywhere near each other once flocks pack tightly; the quadtree's cells shrink to fit them
+    print
+    print "%-10s %6s %10s %10s %10s %8s %8s %8s" % ("collision", "n", "hash(s)", "sap(s)", "quad(s)", "hash", "sap", "quad")
+    for layout in (uniform, packed):
+        for n in SIZES:
+            points = layout(n, rng)
+
+            brute = spatial.BruteForce(WIDTH, HEIGHT).pairs(points, values.COLLISION_DIST)
+            hash_time, hashed = best_time(spatial.SpatialHash(WIDTH, HEIGHT).pairs, points, values.COLLISION_DIST)
+            sap_time, swept = best_time(spatial.SweepAndPrune(WIDTH, HEIGHT).pairs, points, values.COLLISION_DIST)
+            quad_time, quadded = best_time(spatial.QuadTree(WIDTH, HEIGHT).pairs, points, values.COLLISION_DIST)
+
+            print "%-10s %6d %10.4f %10.4f %10.4f %8s %8s %8s" % (
+                layout.__name__, n, hash_time, sap_time, quad_time,
+                check(brute, hashed), check(brute, swept), check(brute, quadded))
+
+    print
+    print "%-10s %6s %10s %10s %10s %10s %8s %8s %8s %8s" % (
+        "match", "n", "hash(s)", "verlet(s)", "sap(s)", "quad(s)", "builds", "verlet", "sap", "quad")
+    for per_team in (25, 100, 200):
+        ticks = recorded_match(per_team, 275)
+
+        # the stateful broadphases see the ticks in order, as they would during the match
+        hash_time, hashed = best_time(replay_pairs, spatial.SpatialHash(WIDTH, HEIGHT), ticks, radius)
+        verlet = spatial.VerletList(WIDTH, HEIGHT)
+        verlet_time, verleted = best_time(replay_pairs, verlet, ticks, radius)
+        sap_time, swept = best_time(replay_pairs, spatial.SweepAndPrune(WIDTH, HEIGHT), ticks, radius)
+        quad_time, quadded = best_time(replay_pairs, spatial.QuadTree(WIDTH, HEIGHT), ticks, radius)
+
+        print "%-10s %6d %10.4f %10.4f %10.4f %10.4f %8d %8s %8s %8s" % (
+            "boidy", 2 * per_team, hash_time, verlet_time, sap_time, quad_time, verlet.builds/REPEATS,
+            check_all(hashed, verleted), check_all(hashed, swept), check_all(hashed, quadded))
+
+if __name__ == '__main__':
+    main()
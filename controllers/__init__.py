@@ -1 +1 @@
-__author__ = 'Faisal'
+__author__ = 'Faisal'
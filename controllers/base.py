@@ -1,31 +1,70 @@
-class Controller(object):
-    """
-    The brains of our birds. Provides the logic for each entity's update cycle and holds some common state between
-    members of the same team, if necessary.
-
-    Override the think() method to implement your own logic.
-    """
-
-    def init(self, me):
-        """
-        Initializes each bird ("me") before the simulation begins. This is largely so your strategy can
-        store custom data with each bird, if you like.
-        """
-        pass
-
-    def think(self, me):
-        """
-        Takes a bird ("me") and produces an acceleration that is applied to the bird next timestep. This method
-        must be overridden by classes which implement Controller to implement custom logic.
-        """
-        pass
-
-    def dead(self, me):
-        """
-        Called at the moment that a bird is killed (i.e its health becomes <= 0). You may use this as a last
-        chance to adjust your strategy.
-        """
-        pass
-
-    def purge(self):
-        pass
\ No newline at end of file
+import random
+import numpy as np
+
+class Controller(object):
+    """
+    The brains of our birds. Provides the logic for each entity's update cycle and holds some common state between
+    members of the same team, if necessary.
+
+    Override the think() method to implement your own logic. Controllers that can think for a whole team at once
+    (e.g. with NumPy) may additionally override think_batch(), which the world then calls instead of think().
+
+    Controllers that need randomness should draw it from self.random, which is their own stream for each match (see
+    reseed()), rather than from the random module, so that matches can be replayed exactly from their seeds. In
+    think_batch(), draw it from the view instead (see TeamView.randint()): an ensemble thinks for many matches at
+    once, and the view hands each of them its own stream.
+    """
+
+    # until reseed() gives us streams of our own, draw from the global ones
+    random = random
+    np_random = np.random
+
+    def init(self, me):
+        """
+        Initializes each bird ("me") before the simulation begins. This is largely so your strategy can
+        store custom data with each bird, if you like.
+        """
+        pass
+
+    def think(self, me):
+        """
+        Takes a bird ("me") and produces an acceleration that is applied to the bird next timestep. This method
+        must be overridden by classes which implement Controller to implement custom logic.
+        """
+        pass
+
+    def think_batch(self, team):
+        """
+        Takes a framework.teamview.TeamView of all the living birds of a team and returns an (n, 2) array holding
+        what think() would have returned for each of them, in the same order as team.members.
+
+        Overriding this is optional: the world falls back to calling think() for each bird of teams whose controller
+        doesn't.
+        """
+        return None
+
+    def dead(self, me):
+        """
+        Called at the moment that a bird is killed (i.e its health becomes <= 0). You may use this as a last
+        chance to adjust your strategy.
+        """
+        pass
+
+    def purge(self):
+        pass
+
+    def reseed(self, seed):
+        """
+        Called before each match (after purge()) with a seed drawn from the world's random stream, to give the
+        controller its own stream in self.random, and a numpy one seeded from it in self.np_random (which is what
+        TeamView.randint() draws from). Override this to also seed any other generators you use.
+        """
+        self.random = random.Random(seed)
+        self.np_random = np.random.RandomState(self.random.randint(0, 2**32 - 1))
+
+def thinks_in_batches(controller):
+    """
+    Whether the given controller overrides Controller.think_batch().
+    """
+    method = type(controller).think_batch
+    return getattr(method, '__func__', method) is not getattr(Controller.think_batch, '__func__', Controller.think_batch)
\ No newline at end of file
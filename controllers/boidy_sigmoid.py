@@ -1,62 +1,99 @@
-import math
-from controllers.base import Controller
-from framework.values import VISION_RADIUS
-from support.euclid import Vector2
-from support.helpers import avg
-
-AVOID_RADIUS = VISION_RADIUS/2.5 # distance under which avoidance takes effect
-AVOID_STRENGTH = 200.0 # strength of the avoid impulse
-ATTRACT_STRENGTH = 100.0 # strength of group cohesion among teammates
-ALIGN_STRENGTH = 300.0 # strength of alignment among teammates
-GOALSEEK_STRENGTH = 600.0 # strength of explicit goal-seeking
-
-def sigmoid(x, shift=0.0):
-    try:
-        return 1.0/(1.0 + math.exp(-1.0 * x + shift))
-    except OverflowError:
-        raise Exception("Overflowed, %f and shift %f" % (x, shift))
-
-class BoidySigmoidController(Controller):
-    def think(self, me):
-        # this'll be where we store the answer
-        total_vec = Vector2()
-
-        friends = []
-
-        # === subgoal 1. avoidance
-        avoid_vec = Vector2()
-        for other, dist in me.neighbors:
-            # avoid all other creatures if they're too close
-            avoid_vec += (other.pos - me.pos) * (1.0 - sigmoid(dist, 24.0))
-
-            if other in me.team.members:
-                friends.append(other)
-
-        # === subgoal 2. attraction
-        # friends = [x[0] for x in me.neighbors if (x in me.team.members)]
-
-        attract_vec = Vector2()
-        if len(friends) > 0:
-            centroid = Vector2(
-                sum([ent.x for ent in friends])/len(friends),
-                sum([ent.y for ent in friends])/len(friends)
-            )
-            # and compute our difference from it
-            attract_vec = (centroid - me.pos)
-            attract_vec *= sigmoid(attract_vec.magnitude(), AVOID_RADIUS+20.0)
-
-        # === subgoal 3. alignment
-        alignment_vec = Vector2()
-        for friend in friends:
-            alignment_vec += friend.v
-
-        # === subgoal 4. goal-seeking (optional)
-        if hasattr(me.team, 'goal'):
-            total_vec += (me.team.goal - me.pos).normalized() * GOALSEEK_STRENGTH
-
-        # compute and return the weighted sum of our subgoals
-        total_vec += (avoid_vec * -1.0 * AVOID_STRENGTH) + \
-                     (attract_vec * ATTRACT_STRENGTH) + \
-                     (alignment_vec.normalized() * ALIGN_STRENGTH)
-
-        return total_vec
\ No newline at end of file
+import math
+import numpy as np
+from controllers.base import Controller
+from framework.kernels import normalized
+from framework.values import VISION_RADIUS
+from support.euclid import Vector2
+from support.helpers import avg
+
+AVOID_RADIUS = VISION_RADIUS/2.5 # distance under which avoidance takes effect
+AVOID_STRENGTH = 200.0 # strength of the avoid impulse
+ATTRACT_STRENGTH = 100.0 # strength of group cohesion among teammates
+ALIGN_STRENGTH = 300.0 # strength of alignment among teammates
+GOALSEEK_STRENGTH = 600.0 # strength of explicit goal-seeking
+
+def sigmoid(x, shift=0.0):
+    try:
+        return 1.0/(1.0 + math.exp(-1.0 * x + shift))
+    except OverflowError:
+        raise Exception("Overflowed, %f and shift %f" % (x, shift))
+
+def sigmoid_array(x, shift=0.0):
+    # elementwise sigmoid(); large inputs just saturate to 0/1 instead of overflowing
+    with np.errstate(over='ignore'):
+        return 1.0/(1.0 + np.exp(-1.0 * x + shift))
+
+class BoidySigmoidController(Controller):
+    def think(self, me):
+        # this'll be where we store the answer
+        total_vec = Vector2()
+
+        friends = []
+        friend_offsets = []
+
+        # === subgoal 1. avoidance
+        avoid_vec = Vector2()
+        for (other, dist), offset, friendly in zip(me.neighbors, me.neighbor_offsets, me.neighbor_is_friend):
+            # avoid all other creatures if they're too close
+            avoid_vec += offset * (1.0 - sigmoid(dist, 24.0))
+
+            if friendly:
+                friends.append(other)
+                friend_offsets.append(offset)
+
+        # === subgoal 2. attraction
+        # friends = [x[0] for x in me.neighbors if (x in me.team.members)]
+
+        attract_vec = Vector2()
+        if len(friends) > 0:
+            # compute our difference from our friends' centroid (measured the short way around the world)
+            centroid = Vector2(
+                sum([offset.x for offset in friend_offsets])/len(friends),
+                sum([offset.y for offset in friend_offsets])/len(friends)
+            )
+            attract_vec = centroid
+            attract_vec *= sigmoid(attract_vec.magnitude(), AVOID_RADIUS+20.0)
+
+        # === subgoal 3. alignment
+        alignment_vec = Vector2()
+        for friend in friends:
+            alignment_vec += friend.v
+
+        # === subgoal 4. goal-seeking (optional)
+        if hasattr(me.team, 'goal'):
+            total_vec += (me.team.goal - me.pos).normalized() * GOALSEEK_STRENGTH
+
+        # compute and return the weighted sum of our subgoals
+        total_vec += (avoid_vec * -1.0 * AVOID_STRENGTH) + \
+                     (attract_vec * ATTRACT_STRENGTH) + \
+                     (alignment_vec.normalized() * ALIGN_STRENGTH)
+
+        return total_vec
+
+    def think_batch(self, team):
+        # the same subgoals as think(), computed for the whole team at once from its neighbor arrays
+        friend = team.nbr_friend
+        friends = team.segment_count(friend)
+
+        # === subgoal 1. avoidance
+        weight = 1.0 - sigmoid_array(team.nbr_dist, 24.0)
+        avoid_vec = team.segment_sum(team.nbr_offset * weight[:, np.newaxis])
+
+        # === subgoal 2. attraction (towards our friends' centroid, relative to us)
+        attract_vec = team.segment_sum(team.nbr_offset * friend[:, np.newaxis])
+        np.divide(attract_vec, friends[:, np.newaxis], out=attract_vec, where=friends[:, np.newaxis] > 0)
+        attract_vec *= sigmoid_array(np.sqrt((attract_vec**2).sum(axis=-1)), AVOID_RADIUS+20.0)[:, np.newaxis]
+
+        # === subgoal 3. alignment
+        alignment_vec = team.segment_sum(team.nbr_vel * friend[:, np.newaxis])
+
+        # compute and return the weighted sum of our subgoals
+        total_vec = (avoid_vec * -1.0 * AVOID_STRENGTH) + \
+                    (attract_vec * ATTRACT_STRENGTH) + \
+                    (normalized(alignment_vec) * ALIGN_STRENGTH)
+
+        # === subgoal 4. goal-seeking (optional)
+        if team.goal is not None:
+            total_vec = normalized((team.goal.x, team.goal.y) - team.pos) * GOALSEEK_STRENGTH + total_vec
+
+        return total_vec
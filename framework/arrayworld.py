@@ -0,0 +1,206 @@
+"""
+A struct-of-arrays backend for World: all simulation state lives in contiguous NumPy arrays (one row per entity) so
+that integration, damping, wrapping and damage are whole-array operations instead of per-entity Python loops.
+"""
+import numpy as np
+from controllers.base import thinks_in_batches
+from framework import kernels, values
+from framework.entities import Bird
+from framework.world import World
+from support.euclid import Vector2
+
+class ArrayBird(Bird):
+    """
+    A bird whose state is a row of its ArrayWorld's arrays. It behaves like any other Entity as far as controllers
+    are concerned, but every attribute read/write goes straight to the world's arrays.
+    """
+
+    def __init__(self, world, x, y):
+        # our row has to exist before Entity.__init__ assigns our initial state through the properties below
+        self.world = world
+        self.index = world._allocate()
+        super(ArrayBird, self).__init__(world, x, y)
+
+    # position getters/setters
+    def getX(self): return float(self.world.pos[self.index, 0])
+    def getY(self): return float(self.world.pos[self.index, 1])
+    def setX(self, v): self.world.pos[self.index, 0] = v
+    def setY(self, v): self.world.pos[self.index, 1] = v
+    x, y = property(getX, setX), property(getY, setY)
+
+    def getPos(self): return Vector2(*self.world.pos[self.index].tolist())
+    def setPos(self, v): self.world.pos[self.index] = (v.x, v.y)
+    pos = property(getPos, setPos)
+
+    # velocity/acceleration getters/setters; these hand out copies, so in-place vector ops (v += ...) still work as
+    # they rebind the attribute through the setter
+    def getV(self): return Vector2(*self.world.vel[self.index].tolist())
+    def setV(self, v): self.world.vel[self.index] = (v.x, v.y)
+    v = property(getV, setV)
+
+    def getA(self): return Vector2(*self.world.acc[self.index].tolist())
+    def setA(self, v): self.world.acc[self.index] = (v.x, v.y)
+    a = property(getA, setA)
+
+    # health + debounce getters/setters
+    def getHealth(self): return int(self.world.health[self.index])
+    def setHealth(self, v): self.world.health[self.index] = v
+    health = property(getHealth, setHealth)
+
+    def getTeamId(self): return int(self.world.team_id[self.index])
+    def setTeamId(self, v): self.world.team_id[self.index] = v
+    team_id = property(getTeamId, setTeamId)
+
+    def getDamageDebounce(self): return int(self.world.debounce[self.index])
+    def setDamageDebounce(self, v): self.world.debounce[self.index] = v
+    damage_debounce = property(getDamageDebounce, setDamageDebounce)
+
+    def integrate(self, dt):
+        raise Exception("ArrayBirds are integrated in bulk by their ArrayWorld")
+
+class ArrayWorld(World):
+    """
+    Drop-in replacement for World that keeps positions, velocities, accelerations, health, debounce counters, team
+    ids and alive flags in NumPy arrays. Entities are ArrayBird views onto rows of those arrays.
+
+    Controllers that implement think_batch() think once per tick for their whole team, through a TeamView whose
+    arrays are sliced straight out of ours, and their accelerations are written into acc in one go; only the rest
+    still think once per entity through the usual Entity interface. Neighbors and colliders are found by the
+    broadphase, like World's (see World.__init__()). Everything else in the update cycle is done with whole-array
+    operations, collision response included: every colliding pair is resolved at once (see
+    kernels.collision_response()), where World walks the pairs one by one.
+    """
+
+    def __init__(self, width, height, headless=False, capacity=64, seed=None, max_neighbors=values.MAX_NEIGHBORS,
+                 broadphase=None):
+        super(ArrayWorld, self).__init__(width, height, headless, broadphase=broadphase, seed=seed,
+                                         max_neighbors=max_neighbors)
+
+        self.count = 0
+        self._pos = np.zeros((capacity, 2))
+        self._vel = np.zeros((capacity, 2))
+        self._acc = np.zeros((capacity, 2))
+        self._health = np.zeros(capacity, dtype=int)
+        self._debounce = np.zeros(capacity, dtype=int)
+        self._team_id = np.zeros(capacity, dtype=int)
+        self._alive = np.zeros(capacity, dtype=bool)
+
+    # views of the live rows of each array
+    def getPos(self): return self._pos[:self.count]
+    def getVel(self): return self._vel[:self.count]
+    def getAcc(self): return self._acc[:self.count]
+    def getHealth(self): return self._health[:self.count]
+    def getDebounce(self): return self._debounce[:self.count]
+    def getTeamId(self): return self._team_id[:self.count]
+    def getAlive(self): return self._alive[:self.count]
+    pos, vel, acc = property(getPos), property(getVel), property(getAcc)
+    health, debounce = property(getHealth), property(getDebounce)
+    team_id, alive = property(getTeamId), property(getAlive)
+
+    def addEntity(self, ent, team):
+        super(ArrayWorld, self).addEntity(ent, team)
+        self._alive[ent.index] = not ent.dead
+        return ent
+
+    def makeBird(self, x, y):
+        return ArrayBird(self, x, y)
+
+    def getDrawState(self):
+        # straight from our arrays
+        return self.pos, self.vel, self.health, self.debounce
+
+    def update(self):
+        # compute collision sets for all entities
+        self._calc_collisions()
+
+        # --------------------------
+        # --- entity thinking
+        # --------------------------
+
+        # batched controllers think for their whole team at once, the rest per entity; either way writing each
+        # entity's row of acc
+        batched = self._think_batches()
+        for i in np.flatnonzero(self.alive):
+            if self.ents[i].team not in batched:
+                self.ents[i].update()
+
+        # decrement counters, etc.
+        self.debounce[self.alive & (self.debounce > 0)] -= 1
+
+        # --------------------------
+        # --- collision response
+        # --------------------------
+
+        if len(self.collisions.index):
+            hit, dmg = kernels.collision_response(self.vel, self.health, self.debounce, *self.collisions.unique_pairs())
+
+            # make hit indications to float upward
+            if not self.headless:
+                for i in np.flatnonzero(hit):
+                    self._add_hit_marker(self.pos[i, 0], self.pos[i, 1], dmg[i])
+
+        # --------------------------
+        # --- death response
+        # --------------------------
+
+        # if we just died, tell our controller (the renderer makes us sad and gray)
+        died = np.flatnonzero(self.alive & (self.health <= 0))
+        self.alive[died] = False
+        for i in died:
+            self.ents[i].controller.dead(self.ents[i])
+
+        # and bring the teams' living member counts and health up to date in bulk
+        alive = np.bincount(self.team_id, weights=self.alive, minlength=len(self.teams))
+        health = np.bincount(self.team_id, weights=self.health * self.alive, minlength=len(self.teams))
+        for k, team in enumerate(self.teams):
+            team.setVitals(int(alive[k]), int(health[k]))
+
+    def integrate(self, dt):
+        # remember where everyone was, for draw() to interpolate from
+        if not self.headless:
+            self.prev_pos = self.pos.copy()
+
+        # perform motion calculations and move all our entities at once
+        kernels.integrate(self.pos, self.vel, self.acc, self.alive, dt, self.width, self.height)
+
+        # and sum up where each team's living members are and how they're moving
+        sums = [np.bincount(self.team_id, weights=column * self.alive, minlength=len(self.teams))
+                for column in (self.pos[:, 0], self.pos[:, 1], self.vel[:, 0], self.vel[:, 1])]
+        for k, team in enumerate(self.teams):
+            team.setMotion(Vector2(sums[0][k], sums[1][k]), Vector2(sums[2][k], sums[3][k]))
+
+    # ====================================================
+    # === Internal Methods
+    # ====================================================
+
+    def _allocate(self):
+        # hand out the next free row, doubling our arrays whenever they fill up
+        if self.count == len(self._pos):
+            for name in ('_pos', '_vel', '_acc', '_health', '_debounce', '_team_id', '_alive'):
+                old = getattr(self, name)
+                grown = np.zeros((len(old)*2,) + old.shape[1:], dtype=old.dtype)
+                grown[:len(old)] = old
+                setattr(self, name, grown)
+
+        self.count += 1
+        return self.count - 1
+
+    def _calc_collisions(self):
+        # like World._calc_collisions(), but with the living and their positions picked straight out of our arrays
+        living = np.flatnonzero(self.alive)
+        self._find_neighborhoods(living, self.team_id, self.pos[living].tolist())
+
+    def _think_batches(self):
+        # like World._think_batches(), but writing the accelerations straight into our array
+        batched = set()
+        for team in self.teams:
+            if not thinks_in_batches(team.controller): continue
+            batched.add(team)
+
+            members = [me for me in team.members if not me.dead]
+            if not members: continue
+
+            view = self._team_view(team, members)
+            self.acc[[me.index for me in members]] = team.controller.think_batch(view) * view.mass[:, np.newaxis]
+
+        return batched
@@ -0,0 +1,246 @@
+"""
+Many-worlds ensembles: plays a whole batch of independent headless matches between the same teams at once, with the
+state of every world stacked into one set of NumPy arrays.
+
+Each tick advances all the still-running worlds together, so the per-tick Python overhead (thinking, collision
+response, integration) is paid once per ensemble instead of once per match. Worlds that have ended drop out of the
+arrays, and the rest carry on without them.
+"""
+import random
+import numpy as np
+from controllers.base import thinks_in_batches
+from framework import kernels, match, values
+from framework.teamview import TeamView
+
+class EnsembleBird(object):
+    """
+    Stand-in for a bird in one of an Ensemble's worlds. Its state lives in the ensemble's arrays; the object itself
+    only exists so that controllers have something to init(), tag (e.g. me.action) and pronounce dead().
+    """
+
+    def __init__(self, ensemble, world, team):
+        self.ensemble = ensemble
+        self.world = world # index of the match (in the order the seeds were given) we belong to
+        self.team = team
+        self.controller = team.controller
+        self.mass = 1.0/values.DEFAULT_MASS
+        self.dead = False
+
+class Ensemble(object):
+    """
+    Plays one match per seed between the given teams, all in lockstep. Every per-entity array has a leading world
+    axis: pos, vel and acc are (worlds, n, 2), and health, debounce and alive are (worlds, n), where n is the number
+    of birds in each world. Team k occupies the same per_team rows of every world.
+
+    Physics are those of ArrayWorld, including its simultaneous collision response. Only controllers that implement
+    think_batch() are supported: each team thinks once per tick for its members across all the worlds at once.
+    max_neighbors caps neighborhoods like it does for World.
+    """
+
+    def __init__(self, width, height, teams, seeds, per_team=values.BIRDS_PER_TEAM, timelimit=0,
+                 end_on_victory=False, dt=values.SIM_DT, max_neighbors=values.MAX_NEIGHBORS):
+        if timelimit <= 0 and not end_on_victory:
+            raise Exception("An ensemble needs a timelimit or end_on_victory, otherwise its matches never end")
+
+        for team in teams:
+            if not thinks_in_batches(team.controller):
+                raise Exception("%s's controller can't think in batches, which ensembles need" % team.name)
+
+        self.width, self.height = width, height
+        self.teams = teams
+        self.per_team = per_team
+        self.end_on_victory = end_on_victory
+        self.dt = dt
+        self.max_neighbors = max_neighbors
+        self.ticklimit = int(round(timelimit / dt))
+        self.ticks = 0
+
+        for team in teams:
+            team.purge()
+
+        worlds, n = len(seeds), len(teams) * per_team
+        self.pos = np.zeros((worlds, n, 2))
+        self.vel = np.zeros((worlds, n, 2))
+        self.acc = np.zeros((worlds, n, 2))
+        self.health = np.full((worlds, n), values.START_HEALTH, dtype=int)
+        self.debounce = np.zeros((worlds, n), dtype=int)
+        self.alive = np.ones((worlds, n), dtype=bool)
+        self.team_id = np.repeat(np.arange(len(teams)), per_team)
+
+        # the match index of each row of the arrays above, and the stand-in birds of each
+        self.world_id = np.arange(worlds)
+        self.members = np.empty((worlds, n), dtype=object)
+
+        # the numpy stream each team's controller draws from in each world (see TeamView.randint())
+        self.randoms = np.empty((worlds, len(teams)), dtype=object)
+
+        # spawn each world's birds from its own seed, just like populate() would have for a single match
+        for w, seed in enumerate(seeds):
+            rng = random.Random(seed)
+            spawns = match.spawn(teams, per_team, width, height, rng)
+
+            # the controllers are shared by all the worlds, so keep the stream reseeding them gives each world
+            match.reseed(teams, rng)
+            for k, team in enumerate(teams):
+                self.randoms[w, k] = team.controller.np_random
+
+            for k, (team, birds) in enumerate(zip(teams, spawns)):
+                for i, (x, y, vx, vy) in enumerate(birds):
+                    row = k*per_team + i
+                    self.pos[w, row] = (x, y)
+                    self.vel[w, row] = (vx, vy)
+
+                    me = self.members[w, row] = EnsembleBird(self, w, team)
+                    team.members.append(me)
+                    team.controller.init(me)
+
+        # the (team, health) winner of each match, filled in as the matches end
+        self.winners = [None] * worlds
+
+        # pairwise offsets/distances/neighbors/collisions from the last _calc_collisions()
+        self._offset = self._dist = self._near = self._colliding = None
+
+    def __len__(self):
+        # the number of matches still running
+        return len(self.world_id)
+
+    def run(self):
+        """
+        Steps until every match has ended and returns the list of (team, health) winners, in the order of the seeds.
+        """
+        while len(self):
+            self.step()
+
+        return self.winners
+
+    def step(self):
+        """
+        Advances every running match by one tick, then retires those that have ended.
+        """
+        self._calc_collisions()
+
+        # --------------------------
+        # --- entity thinking
+        # --------------------------
+
+        for k, team in enumerate(self.teams):
+            rows = self.alive & (self.team_id == k)
+            if not rows.any(): continue
+
+            view = self._team_view(team, rows)
+            self.acc[rows] = team.controller.think_batch(view) * view.mass[:, np.newaxis]
+
+        # decrement counters, etc.
+        self.debounce[self.alive & (self.debounce > 0)] -= 1
+
+        # --------------------------
+        # --- collision response
+        # --------------------------
+
+        if self._colliding.any():
+            # (on flat views of the state, in which the pairs number the entities of every world one after another)
+            kernels.collision_response(self.vel.reshape(-1, 2), self.health.reshape(-1), self.debounce.reshape(-1),
+                                       *kernels.colliding_pairs(self._offset, self._dist, self._colliding))
+
+        # --------------------------
+        # --- death response
+        # --------------------------
+
+        died = self.alive & (self.health <= 0)
+        self.alive[died] = False
+        for me in self.members[died]:
+            me.dead = True
+            me.controller.dead(me)
+
+        kernels.integrate(self.pos, self.vel, self.acc, self.alive, self.dt, self.width, self.height)
+        self.ticks += 1
+
+        self._retire()
+
+    def team_health(self):
+        """
+        Returns the (worlds, teams) summed health of each team's living members in each running match.
+        """
+        health = np.where(self.alive, self.health, 0)
+        return health.reshape(len(self), len(self.teams), self.per_team).sum(axis=-1)
+
+    # ====================================================
+    # === Internal Methods
+    # ====================================================
+
+    def _calc_collisions(self):
+        # all pairwise offsets (other - me) and distances within each world at once; like the broadphases (which
+        # ArrayWorld finds its neighbors with), each pair is measured from its lower-numbered entity and the other gets
+        # the negated offset, so both agree to the last bit
+        n = self.pos.shape[1]
+        self._offset = self.pos[:, np.newaxis, :, :] - self.pos[:, :, np.newaxis, :]
+        kernels.min_image(self._offset, self.width, self.height)
+        rows, cols = np.tril_indices(n, -1)
+        self._offset[:, rows, cols] = -self._offset[:, cols, rows]
+        self._dist = np.sqrt((self._offset**2).sum(axis=-1))
+
+        # only living pairs of distinct entities count
+        valid = self.alive[:, :, np.newaxis] & self.alive[:, np.newaxis, :] & ~np.eye(n, dtype=bool)
+
+        self._near = kernels.nearest(self._dist, valid & (self._dist <= values.VISION_RADIUS), self.max_neighbors)
+        self._colliding = valid & (self._dist <= values.COLLISION_DIST) & \
+                          (self.team_id[:, np.newaxis] != self.team_id[np.newaxis, :])
+
+    def _team_view(self, team, rows):
+        # one view over the team's living members in every world, ordered by world then row, like ArrayWorld's
+        worlds, idx = np.nonzero(rows)
+        owners, cols = np.nonzero(self._near[worlds, idx])
+
+        # each world's members draw from that world's stream
+        present, counts = np.unique(worlds, return_counts=True)
+        random_ptr = np.zeros(len(present) + 1, dtype=int)
+        np.cumsum(counts, out=random_ptr[1:])
+
+        # neighbors sorted by dist asc within each member's row (ties by entity order)
+        nbr_world = worlds[owners]
+        order = np.lexsort((cols, self._dist[nbr_world, idx[owners], cols], owners))
+        owners, cols, nbr_world = owners[order], cols[order], nbr_world[order]
+
+        nbr_ptr = np.zeros(len(idx) + 1, dtype=int)
+        np.cumsum(np.bincount(owners, minlength=len(idx)), out=nbr_ptr[1:])
+
+        members = self.members[rows].tolist()
+        return TeamView(team, members,
+                        pos=self.pos[rows], vel=self.vel[rows], health=self.health[rows].astype(float),
+                        mass=np.array([me.mass for me in members], dtype=float),
+                        nbr_ptr=nbr_ptr,
+                        nbr_dist=self._dist[nbr_world, idx[owners], cols],
+                        nbr_offset=self._offset[nbr_world, idx[owners], cols],
+                        nbr_vel=self.vel[nbr_world, cols],
+                        nbr_friend=self.team_id[cols] == self.team_id[idx[0]],
+                        randoms=self.randoms[present, self.teams.index(team)].tolist(), random_ptr=random_ptr)
+
+    def _retire(self):
+        # find the matches that have ended, by the same rules as headless.run()
+        health = self.team_health()
+        ended = np.zeros(len(self), dtype=bool)
+        if self.end_on_victory:
+            ended |= (health > 0).sum(axis=1) <= 1
+        if self.ticklimit > 0 and self.ticks >= self.ticklimit:
+            ended[:] = True
+
+        if not ended.any(): return
+
+        # the healthiest team wins, ties going to the first team like decide_winner()
+        for w in np.flatnonzero(ended):
+            best = int(health[w].argmax())
+            self.winners[self.world_id[w]] = (self.teams[best], int(health[w, best]))
+            self.teams[best].score += 1
+
+        # and drop them from the arrays
+        keep = ~ended
+        for name in ('pos', 'vel', 'acc', 'health', 'debounce', 'alive', 'world_id', 'members', 'randoms'):
+            setattr(self, name, getattr(self, name)[keep])
+
+def run(width, height, teams, seeds, per_team=values.BIRDS_PER_TEAM, timelimit=0, end_on_victory=False,
+        dt=values.SIM_DT, max_neighbors=values.MAX_NEIGHBORS):
+    """
+    Plays one headless match per seed between the given teams, all at once, and returns the list of their (team,
+    health) winners in the order of the seeds. Each winner is credited with a point like headless.run() does.
+    """
+    return Ensemble(width, height, teams, seeds, per_team, timelimit, end_on_victory, dt, max_neighbors).run()
@@ -0,0 +1,147 @@
+"""
+Population-based evolution of StateController state tables.
+
+A genome is a controller's 16x5 state table as an int array (see StateController.getGenome()): each row holds the
+percent chances of the five actions in one state and sums to 100. A population is a (size, 16, 5) stack of genomes,
+and mutation, crossover and selection all operate on the whole stack at once.
+
+Fitness is measured by playing every genome against a rival over the same set of seeds, each genome's matches being
+played as one ensemble (see framework.ensemble) by a pool of worker processes.
+"""
+import multiprocessing
+import numpy as np
+from controllers.state import StateController
+from framework import ensemble, values
+from framework.team import Team
+
+STATES, ACTIONS = 16, 5
+CHANCE_TOTAL = 100 # what each row of a genome sums to
+
+# ====================================================
+# === Genetic operators
+# ====================================================
+
+def random_genomes(rng, count):
+    """
+    Draws count random genomes the same way StateController(0) draws its table: by splitting 100 at four random
+    (sorted) points in each row.
+    """
+    cuts = np.sort(rng.randint(1, CHANCE_TOTAL + 1, size=(count, STATES, ACTIONS - 1)), axis=-1)
+    bounds = np.concatenate([np.zeros((count, STATES, 1), dtype=int), cuts,
+                             np.full((count, STATES, 1), CHANCE_TOTAL, dtype=int)], axis=-1)
+    return np.diff(bounds, axis=-1)
+
+def normalize(genomes):
+    """
+    Returns the given (non-negative) genomes with every row scaled back to whole percentages summing to 100. Rows
+    that are all zero become uniform.
+    """
+    genomes = np.asarray(genomes, dtype=float)
+    totals = genomes.sum(axis=-1, keepdims=True)
+    genomes = np.where(totals > 0, genomes / np.where(totals > 0, totals, 1.0), 1.0 / ACTIONS) * CHANCE_TOTAL
+
+    # round down, then hand whatever is left of each row's 100 to its largest entry
+    rounded = np.floor(genomes).astype(int)
+    short = CHANCE_TOTAL - rounded.sum(axis=-1)
+    largest = genomes.argmax(axis=-1)
+    np.put_along_axis(rounded, largest[..., np.newaxis],
+                      np.take_along_axis(rounded, largest[..., np.newaxis], axis=-1) + short[..., np.newaxis],
+                      axis=-1)
+    return rounded
+
+def mutate(genomes, rng, rate=0.1, scale=10.0):
+    """
+    Returns mutated copies of the given genomes: each chance is perturbed by normal noise of the given scale (in
+    percent) with probability rate, after which the rows are renormalized.
+    """
+    noise = rng.normal(0.0, scale, size=genomes.shape) * (rng.random_sample(genomes.shape) < rate)
+    return normalize(np.maximum(genomes + noise, 0.0))
+
+def crossover(mothers, fathers, rng):
+    """
+    Uniform crossover between matching pairs of genomes: each child takes every row (i.e. its whole behavior in that
+    state) from either its mother or its father, so the rows stay valid without renormalizing.
+    """
+    from_mother = rng.random_sample(mothers.shape[:-1] + (1,)) < 0.5
+    return np.where(from_mother, mothers, fathers)
+
+def select(fitness, rng, count, size=3):
+    """
+    Tournament selection: returns the indices of count winners, each the fittest of size randomly picked genomes.
+    """
+    entrants = rng.randint(0, len(fitness), size=(count, size))
+    return entrants[np.arange(count), np.asarray(fitness)[entrants].argmax(axis=1)]
+
+# ====================================================
+# === Fitness
+# ====================================================
+
+def evaluate(job):
+    """
+    Plays one genome against the rival in a worker and returns its fitness; job is a (genome, rival, seeds,
+    match_args) tuple.
+
+    Each match scores the winner's remaining health as a fraction of its starting total, positive if the genome won
+    and negative if the rival did. The fitness is the mean over all the seeds.
+    """
+    genome, rival, seeds, match_args = job
+    teams = [Team(name="challenger", controller=StateController.from_genome(genome)),
+             Team(name="rival", controller=StateController.from_genome(rival))]
+
+    winners = ensemble.run(teams=teams, seeds=seeds, **match_args)
+
+    full = float(match_args.get('per_team', values.BIRDS_PER_TEAM) * values.START_HEALTH)
+    return np.mean([(health if team is teams[0] else -health) / full for team, health in winners])
+
+def fitnesses(pool, genomes, rival, seeds, match_args):
+    """
+    Evaluates every genome against the rival over the same seeds, in parallel if given a pool.
+    """
+    jobs = [(genome, rival, seeds, match_args) for genome in genomes]
+    return np.array(pool.map(evaluate, jobs) if pool else map(evaluate, jobs))
+
+# ====================================================
+# === Evolution
+# ====================================================
+
+def run(generations, size=32, matches=16, elite=2, rate=0.1, scale=10.0, rival=None, processes=None, seed=None,
+        **match_args):
+    """
+    Evolves a population of size genomes for the given number of generations and returns the fittest genome found
+    along with its fitness.
+
+    Every generation, each genome plays matches matches against the rival (the hardcoded winner table by default)
+    on fresh seeds shared by the whole generation. The elite fittest genomes survive unchanged; the rest of the next
+    generation are mutated children of tournament-selected parents. Fitness is evaluated by a pool of processes
+    worker processes (one per CPU by default), and match_args are passed through to ensemble.run(). Giving a seed
+    makes the whole run reproducible.
+    """
+    rng = np.random.RandomState(seed)
+    if rival is None:
+        rival = StateController(1).getGenome()
+
+    population = random_genomes(rng, size)
+    best, best_fitness = None, None
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for generation in xrange(generations):
+            seeds = rng.randint(0, values.MAX_SEED, size=matches).tolist()
+            fitness = fitnesses(pool, population, rival, seeds, match_args)
+
+            ranked = np.argsort(-fitness, kind='mergesort')
+            if best_fitness is None or fitness[ranked[0]] > best_fitness:
+                best, best_fitness = population[ranked[0]].copy(), fitness[ranked[0]]
+            print "generation %d: best %.3f, mean %.3f" % (generation, fitness[ranked[0]], fitness.mean())
+
+            # breed the next generation
+            children = size - elite
+            mothers = population[select(fitness, rng, children)]
+            fathers = population[select(fitness, rng, children)]
+            population = np.concatenate([population[ranked[:elite]],
+                                         mutate(crossover(mothers, fathers, rng), rng, rate, scale)])
+    finally:
+        pool.close()
+        pool.join()
+
+    return best, best_fitness
@@ -1,159 +1,184 @@
-import random
-import operator
-import pyglet
-from pyglet.window import mouse, key
-from framework import values
-from framework.entities import Bird
-from framework.world import World
-from support.euclid import Vector2
-
-def run(width, height, teams=[], per_team=values.BIRDS_PER_TEAM, randseed=-1, timelimit=0, end_on_victory=False):
-    window = pyglet.window.Window(width=width, height=height)
-
-    if randseed != -1:
-        random.seed(randseed)
-
-    myworld = World(window.width, window.height)
-    myworld.chosen_ent = None
-    myworld.winner = None
-
-    # create a HUD to show us info about the selected entity
-    HUDlabel = pyglet.text.Label(
-        x=5, y=window.height-5, anchor_y="top",
-        font_name="Courier New", font_size=10.0,
-        multiline=True, width=window.width,
-        color=(255,255,255,200)
-    )
-
-    HUDTeamScores = pyglet.text.Label(
-        x=5, y=5, anchor_y="bottom",
-        font_name="Courier New", font_size=10.0,
-        multiline=True, width=window.width,
-        color=(255,255,255,100)
-    )
-
-    # assign the teams wholesale to world
-    for team in teams:
-        team.purge()
-
-    myworld.teams = teams
-
-    # generate teams around some random points
-    for team in teams:
-        # set its centroid
-        center = Vector2(random.randint(0,window.width/2) + window.width/2, random.randint(0,window.height/2) + window.height/2)
-
-        # create the birds in this team
-        for i in xrange(per_team):
-            # compute a random pos within the radius of our centroid
-            # discretized to give our little fearsome monsters some space
-            x = center.x + random.randrange(-values.FLOCK_SPREAD, values.FLOCK_SPREAD, values.FLOCK_INTERNAL_DIST)
-            y = center.y + random.randrange(-values.FLOCK_SPREAD, values.FLOCK_SPREAD, values.FLOCK_INTERNAL_DIST)
-            ent = myworld.addEntity(Bird(myworld, x, y), team=team)
-            ent.controller = team.controller
-            ent.controller.init(ent)
-            # and give a default velocity to make things interesting
-            ent.v = Vector2(random.uniform(-15.0, 15.0), random.uniform(-15.0, 15.0))
-
-    @window.event
-    def on_draw():
-        window.clear()
-        myworld.draw()
-
-        # display info about the chosen ent, if they exist
-        if myworld.chosen_ent:
-            HUDlabel.text = """Health: %(health)4d, Team: %(team)s\nController: %(controller)s""" % {
-                'health': myworld.chosen_ent.health,
-                'team': myworld.chosen_ent.team.name,
-                'controller': myworld.chosen_ent.controller.__class__.__name__
-            }
-            HUDlabel.draw()
-
-        # draw team info, calculated in update()
-        HUDTeamScores.draw()
-
-    @window.event
-    def on_mouse_press(x, y, button, modifiers):
-        # left button chooses a boid
-        # right button assigns a destination for all the boids in the chosen boid's team
-        if button == mouse.LEFT:
-            # clear the previous selection's attributes, if selected
-            try:
-                myworld.chosen_ent.sprite.scale = 1.0
-                del myworld.chosen_ent.color_masks['selected']
-                myworld.chosen_ent.sprite.color = myworld.chosen_ent.base_color
-                myworld.chosen_ent = None
-            except AttributeError:
-                # and just throw it away
-                pass
-
-            # and find our new selection
-            for ent in myworld.ents:
-                if not ent.dead and Vector2(ent.x - x, ent.y - y).magnitude() <= 24.0:
-                    myworld.chosen_ent = ent
-                    myworld.chosen_ent.color_masks['selected'] = (255,255,255)
-                    myworld.chosen_ent.sprite.scale = 1.8
-                    break
-        elif button == mouse.RIGHT:
-            try:
-                myworld.chosen_ent.team.goal = Vector2(x,y)
-                myworld.chosen_ent.team.goal_sprite = pyglet.sprite.Sprite(x=x, y=y, img=myworld.goal_img)
-                myworld.chosen_ent.team.goal_sprite.color = myworld.chosen_ent.team.color
-            except AttributeError:
-                pass
-
-    @window.event
-    def on_key_release(symbol, modifiers):
-        # releases the goal of the currently selected team
-        if symbol == key.SPACE:
-            try:
-                del myworld.chosen_ent.team.goal
-                del myworld.chosen_ent.team.goal_sprite
-            except AttributeError:
-                pass
-            except KeyError:
-                pass
-
-    def update(dt):
-        myworld.update()
-        myworld.integrate(dt)
-
-        # also populate team info textbox
-        teamScores = []
-        survivors = 0
-        for team in myworld.teams:
-            teamHealth = sum([x.health for x in team.members if not x.dead])
-            teamScores.append( "%(name)8s: %(health)4d %(bar)s" % {
-                'name': team.name,
-                'health': teamHealth,
-                'bar': ("*" * int(10 * teamHealth/(len(team.members) * values.START_HEALTH)))
-            })
-
-            if teamHealth > 0:
-                survivors += 1
-
-        HUDTeamScores.text = "\n".join(teamScores)
-
-        # if we end on victory, check for victory conditions
-        if end_on_victory and survivors <= 1:
-            endgame(0)
-
-    pyglet.clock.schedule_interval(update, 1.0/60.0)
-
-    def endgame(dt):
-        # figure out who the winner is
-        teamScores = [(team, sum([x.health for x in team.members if not x.dead])) for team in myworld.teams]
-        myworld.winner = max(teamScores, key=operator.itemgetter(1))
-        if myworld.winner:
-            myworld.winner[0].score += 1
-
-        pyglet.app.exit()
-
-    # also schedule and ending timer to call the victory checker/ender
-    if timelimit > 0:
-        pyglet.clock.schedule_once(endgame, timelimit)
-
-    pyglet.app.run()
-    window.close()
-
-    return myworld.winner
+import time
+import pyglet
+from pyglet.window import mouse, key
+from framework import values
+from framework.match import match_seed, populate, team_health, count_survivors, decide_winner
+from framework.replay import Recorder
+from framework.world import World
+from support.euclid import Vector2
+
+def run(width, height, teams=[], per_team=values.BIRDS_PER_TEAM, randseed=-1, timelimit=0, end_on_victory=False,
+        world_class=World, replay=None, dt=values.SIM_DT, speed=1.0, render=True):
+    """
+    Plays a match in a window and returns the (team, health) tuple of the winner, or None if the window was closed
+    before the match ended.
+
+    The simulation advances in fixed ticks of dt simulated seconds, exactly like headless.run(), however fast or
+    slowly frames are rendered: speed is how many simulated seconds pass per real one, and each rendered frame runs
+    however many ticks are due (but spends at most values.FRAME_BUDGET doing so, letting the simulation fall behind
+    rather than the window freeze). Frames are drawn between the last two ticks' states. With render off, the world
+    isn't drawn at all and every frame simulates for its whole budget.
+
+    A randseed of -1 plays the match from a fresh seed, which is shown in the HUD and recorded with the replay (if
+    there is one), so that it can be played again.
+
+    While it runs, up/down double/halve the speed and R toggles rendering.
+    """
+    window = pyglet.window.Window(width=width, height=height)
+
+    # a randseed of -1 plays from a fresh seed, which is kept as the world's seed and recorded with the replay
+    randseed = match_seed(randseed)
+
+    myworld = world_class(window.width, window.height, seed=randseed)
+    myworld.winner = None
+    myworld.seed = randseed
+
+    # create a HUD to show us info about the selected entity
+    HUDlabel = pyglet.text.Label(
+        x=5, y=window.height-5, anchor_y="top",
+        font_name="Courier New", font_size=10.0,
+        multiline=True, width=window.width,
+        color=(255,255,255,200)
+    )
+
+    HUDTeamScores = pyglet.text.Label(
+        x=5, y=5, anchor_y="bottom",
+        font_name="Courier New", font_size=10.0,
+        multiline=True, width=window.width,
+        color=(255,255,255,100)
+    )
+
+    # spawn the teams' birds
+    populate(myworld, teams, per_team)
+
+    # and record the match if asked to (see framework.replay)
+    recorder = Recorder(replay, myworld, seed=randseed, dt=dt) if replay else None
+    if recorder: recorder.record()
+
+    @window.event
+    def on_draw():
+        window.clear()
+        if sim['render']:
+            myworld.draw(sim['lag'] / dt)
+
+        # display info about the chosen ent, if they exist
+        if myworld.chosen_ent:
+            HUDlabel.text = """Health: %(health)4d, Team: %(team)s\nController: %(controller)s""" % {
+                'health': myworld.chosen_ent.health,
+                'team': myworld.chosen_ent.team.name,
+                'controller': myworld.chosen_ent.controller.__class__.__name__
+            }
+            HUDlabel.draw()
+
+        # draw team info, calculated in update()
+        HUDTeamScores.draw()
+
+    @window.event
+    def on_mouse_press(x, y, button, modifiers):
+        # left button chooses a boid
+        # right button assigns a destination for all the boids in the chosen boid's team
+        if button == mouse.LEFT:
+            # clear the previous selection's attributes, if selected
+            try:
+                del myworld.chosen_ent.color_masks['selected']
+                myworld.chosen_ent = None
+            except AttributeError:
+                # and just throw it away
+                pass
+
+            # and find our new selection
+            for ent in myworld.ents:
+                if not ent.dead and Vector2(ent.x - x, ent.y - y).magnitude() <= 24.0:
+                    myworld.chosen_ent = ent
+                    myworld.chosen_ent.color_masks['selected'] = (255,255,255)
+                    break
+        elif button == mouse.RIGHT:
+            try:
+                myworld.chosen_ent.team.goal = Vector2(x,y)
+                myworld.chosen_ent.team.goal_sprite = pyglet.sprite.Sprite(x=x, y=y, img=myworld.goal_img)
+                myworld.chosen_ent.team.goal_sprite.color = myworld.chosen_ent.team.color
+            except AttributeError:
+                pass
+
+    @window.event
+    def on_key_release(symbol, modifiers):
+        # releases the goal of the currently selected team
+        if symbol == key.SPACE:
+            try:
+                del myworld.chosen_ent.team.goal
+                del myworld.chosen_ent.team.goal_sprite
+            except AttributeError:
+                pass
+            except KeyError:
+                pass
+
+    # the simulation's clock: how much simulated time is owed since the last tick, how fast it passes and whether
+    # we're drawing the world
+    ticklimit = int(round(timelimit / dt))
+    myworld.ticks = 0
+    sim = {'lag': 0.0, 'speed': speed, 'render': render, 'over': False}
+
+    @window.event
+    def on_key_press(symbol, modifiers):
+        if symbol == key.UP:
+            sim['speed'] *= 2.0
+        elif symbol == key.DOWN:
+            sim['speed'] /= 2.0
+        elif symbol == key.R:
+            sim['render'] = not sim['render']
+
+    def tick():
+        myworld.update()
+        myworld.integrate(dt)
+        myworld.ticks += 1
+        if recorder: recorder.record(dt)
+
+        # if we end on victory, check for victory conditions
+        if end_on_victory and count_survivors(myworld) <= 1:
+            endgame()
+        elif ticklimit > 0 and myworld.ticks >= ticklimit:
+            endgame()
+
+    def update(elapsed):
+        # run the ticks that have come due (or, when not rendering, as many as fit in our budget)
+        deadline = time.time() + values.FRAME_BUDGET
+        sim['lag'] += elapsed * sim['speed'] if sim['render'] else float('inf')
+        while sim['lag'] >= dt and not sim['over']:
+            tick()
+            sim['lag'] -= dt
+            if time.time() >= deadline: break
+
+        # out of time: forget the ticks we couldn't get to rather than trying to catch up on them
+        sim['lag'] = min(sim['lag'], dt * 0.999)
+
+        # also populate team info textbox
+        teamScores = []
+        for team in myworld.teams:
+            teamHealth = team_health(team)
+            teamScores.append( "%(name)8s: %(health)4d %(bar)s" % {
+                'name': team.name,
+                'health': teamHealth,
+                'bar': ("*" * int(10 * teamHealth/(len(team.members) * values.START_HEALTH)))
+            })
+        teamScores.append("%.1fs, speed %gx, seed %d%s" % (myworld.ticks * dt, sim['speed'], myworld.seed,
+                                                           "" if sim['render'] else ", not rendering (R)"))
+
+        HUDTeamScores.text = "\n".join(teamScores)
+
+    pyglet.clock.schedule_interval(update, 1.0/60.0)
+
+    def endgame():
+        # figure out who the winner is
+        sim['over'] = True
+        decide_winner(myworld)
+
+        pyglet.app.exit()
+
+    try:
+        pyglet.app.run()
+    finally:
+        pyglet.clock.unschedule(update)
+        window.close()
+        if recorder: recorder.close()
+
+    return myworld.winner
\ No newline at end of file
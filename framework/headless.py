@@ -0,0 +1,55 @@
+from framework import values
+from framework.replay import Recorder
+from framework.match import match_seed, populate, count_survivors, decide_winner
+from framework.world import World
+
+def run(width, height, teams=[], per_team=values.BIRDS_PER_TEAM, randseed=-1, timelimit=0, end_on_victory=False,
+        dt=values.SIM_DT, world_class=World, replay=None):
+    """
+    Plays a match exactly like harness.run(), but without a window, GL context or sprites.
+
+    The world is stepped in a tight loop at a fixed simulated timestep dt rather than on pyglet's clock, so a match
+    takes however long the simulation needs instead of its wall-clock length. timelimit is still given in (simulated)
+    seconds and is converted into a number of ticks up front.
+
+    If replay is given, the match is recorded to a replay file at that path (see framework.replay). A randseed of -1
+    plays the match from a fresh seed, which the replay records, so that it can be played again.
+
+    Returns the (team, health) tuple of the winner, like harness.run().
+    """
+    if timelimit <= 0 and not end_on_victory:
+        raise Exception("A headless match needs a timelimit or end_on_victory, otherwise it never ends")
+
+    # a randseed of -1 plays from a fresh seed, which is kept as the world's seed and recorded with the replay
+    randseed = match_seed(randseed)
+
+    myworld = world_class(width, height, headless=True, seed=randseed)
+    myworld.winner = None
+    myworld.seed = randseed
+
+    # spawn the teams' birds
+    populate(myworld, teams, per_team)
+
+    ticklimit = int(round(timelimit / dt))
+    myworld.ticks = 0
+
+    recorder = Recorder(replay, myworld, seed=randseed, dt=dt) if replay else None
+    try:
+        if recorder: recorder.record()
+
+        while True:
+            myworld.update()
+            myworld.integrate(dt)
+            myworld.ticks += 1
+            if recorder: recorder.record(dt)
+
+            # if we end on victory, check for victory conditions
+            if end_on_victory and count_survivors(myworld) <= 1:
+                break
+
+            if ticklimit > 0 and myworld.ticks >= ticklimit:
+                break
+    finally:
+        if recorder: recorder.close()
+
+    return decide_winner(myworld)
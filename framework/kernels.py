@@ -0,0 +1,129 @@
+"""
+Whole-array versions of the per-entity physics in framework.entities.
+
+Every kernel works on arrays with any number of leading dimensions, with the entity axis last before the (x, y)
+axis, e.g. pos is (n, 2) for a single world. Kernels operate in place where they can to avoid churning temporaries.
+"""
+import numpy as np
+from framework import values
+
+def integrate(pos, vel, acc, alive, dt, width, height):
+    """
+    Array counterpart of Entity.integrate(): moves, accelerates, damps and wraps every entity at once, then zeroes the
+    accelerations.
+    """
+    # perform euler integration to find our position
+    pos += vel*dt + 0.5*acc*(dt**2.0)
+
+    vel += acc*dt
+
+    # zero out the accel each round
+    acc[...] = 0.0
+
+    # and damp the velocity
+    vel *= np.where(alive, values.VELOCITY_DAMPING, values.VELOCITY_DAMPING_DEAD)[..., np.newaxis]
+
+    # toroidally map x and y to the world limits
+    wrap(pos, width, height)
+
+def wrap(pos, width, height):
+    """
+    Maps positions onto the torus [0, width) x [0, height), in place.
+    """
+    np.mod(pos, (width, height), out=pos)
+
+def min_image(delta, width, height):
+    """
+    Maps separation vectors onto their shortest equivalents on the torus, in place (the array counterpart of
+    spatial.wrap_delta()).
+    """
+    size = np.array([width, height], dtype=float)
+    np.mod(delta, size, out=delta)
+    delta -= size * (delta > size * 0.5)
+
+def normalized(vecs):
+    """
+    Returns each row of vecs scaled to unit length. Zero vectors stay zero, like Vector2.normalized().
+    """
+    mag = np.sqrt((vecs**2).sum(axis=-1))[..., np.newaxis]
+    return np.divide(vecs, mag, out=np.zeros_like(vecs), where=mag > 0)
+
+def nearest(dist, mask, k):
+    """
+    Narrows mask down to the (at most) k entries with the smallest dist in each row, ties going to the lowest index
+    as with a stable sort. A k of 0 leaves mask as it is.
+    """
+    if k <= 0 or mask.shape[-1] <= k:
+        return mask
+
+    # the k-th smallest distance in each row, found by partial selection rather than sorting the whole row
+    dist = np.where(mask, dist, np.inf)
+    kth = np.partition(dist, k - 1, axis=-1)[..., k-1:k]
+
+    # everything closer than that makes it, plus as many of those exactly that far as there's room for
+    closer = dist < kth
+    tied = mask & (dist == kth)
+    tied &= np.cumsum(tied, axis=-1) <= k - closer.sum(axis=-1)[..., np.newaxis]
+    return closer | tied
+
+def collision_damage(alike, speed):
+    """
+    Damage dealt to each bird by a collision, given how alike its heading is to its collider's (the dot product of
+    their normalized velocities) and its collider's speed; mirrors the formula in World._hurt().
+    """
+    dmg = np.floor((alike + 1.0) * speed * values.COLLISION_DAMAGE_MULT + values.COLLISION_DAMAGE_STATIC)
+    return np.maximum(dmg, 0).astype(int)
+
+def colliding_pairs(offset, dist, colliding):
+    """
+    Picks the colliding pairs out of the pairwise (..., n, n) offsets (other - me), distances and collision flags,
+    in the form collision_response() takes them (like Neighborhoods.unique_pairs() does for a single world). Entities are numbered by their flat index over all the leading axes,
+    and each pair is listed once.
+
+    Returns the numbers of the first and second entity of each pair, the shortest offset from the first to the
+    second, and the number of each entity's nearest collider (or -1 if it has none).
+    """
+    n = colliding.shape[-1]
+    idx = np.nonzero(colliding & (np.arange(n)[:, np.newaxis] < np.arange(n)))
+    base = np.ravel_multi_index(idx[:-2], colliding.shape[:-2]) * n if colliding.ndim > 2 else 0
+    first, second = base + idx[-2], base + idx[-1]
+
+    # the nearest collider of each entity lies in the same leading slice as it does
+    row = np.arange(colliding[..., 0].size)
+    nearest = np.where(colliding, dist, np.inf).argmin(axis=-1).ravel() + row // n * n
+    nearest[~colliding.any(axis=-1).ravel()] = -1
+
+    return first, second, offset[idx], nearest
+
+def collision_response(vel, health, debounce, first, second, offset, nearest):
+    """
+    Array counterpart of the collision response in World.update(), for every colliding pair at once (as given by
+    colliding_pairs()) and evaluated from the velocities at the start of the phase. vel, health and debounce are the
+    (N, 2), (N,) and (N,) state of the entities the pairs number.
+
+    Both birds of a pair get an impulse away from each other, and each is damaged by its nearest collider unless it's
+    still debouncing from an earlier hit. Updates vel, health and debounce in place and returns the (N,) mask of
+    entities that took damage along with the damage each of them would have taken.
+    """
+    # what the two birds of a pair share: the direction from the first to the second, and how alike their headings are
+    away = normalized(offset) * values.COLLISION_REPULSE_MULT
+    heading = normalized(vel)
+    alike = (heading[first] * heading[second]).sum(axis=-1)
+    speed = np.sqrt((vel**2).sum(axis=-1))
+
+    # each bird's nearest collider is the other bird of exactly one of its pairs, and only that one hurts it
+    dmg = np.zeros(len(vel), dtype=int)
+    for me, other in ((first, second), (second, first)):
+        by_nearest = nearest[me] == other
+        dmg[me[by_nearest]] = collision_damage(alike[by_nearest], speed[other[by_nearest]])
+
+    # (only those not already reeling from an earlier attack)
+    hit = (nearest >= 0) & (debounce <= 0)
+    health -= np.where(hit, dmg, 0)
+    debounce[hit] = values.DAMAGE_DEBOUNCE_MAX
+
+    # and push both birds of every pair apart
+    np.subtract.at(vel, first, away)
+    np.add.at(vel, second, away)
+
+    return hit, dmg
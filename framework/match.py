@@ -0,0 +1,96 @@
+"""
+Match setup and scoring shared by the windowed harness and the headless runner, so that both play by exactly the
+same rules.
+"""
+import operator
+import random
+from framework import values
+from support.euclid import Vector2
+
+def match_seed(randseed):
+    """
+    Returns randseed, or a fresh seed drawn from the system if it's -1 (any seed), so that every match is played from
+    a seed it can be replayed from.
+    """
+    if randseed == -1:
+        return random.SystemRandom().randint(0, values.MAX_SEED)
+    return randseed
+
+def spawn(teams, per_team, width, height, rng):
+    """
+    Generates the starting state of each team's birds, clustered around a random centroid per team: returns a list
+    holding a list of (x, y, vx, vy) tuples for each team. rng is the random number generator to draw from.
+    """
+    spawns = []
+
+    # generate teams around some random points
+    for team in teams:
+        # set its centroid
+        center = Vector2(rng.randint(0,width/2) + width/2, rng.randint(0,height/2) + height/2)
+
+        # create the birds in this team
+        birds = []
+        for i in xrange(per_team):
+            # compute a random pos within the radius of our centroid
+            # discretized to give our little fearsome monsters some space
+            x = center.x + rng.randrange(-values.FLOCK_SPREAD, values.FLOCK_SPREAD, values.FLOCK_INTERNAL_DIST)
+            y = center.y + rng.randrange(-values.FLOCK_SPREAD, values.FLOCK_SPREAD, values.FLOCK_INTERNAL_DIST)
+            # and give a default velocity to make things interesting
+            birds.append((x, y, rng.uniform(-15.0, 15.0), rng.uniform(-15.0, 15.0)))
+
+        spawns.append(birds)
+
+    return spawns
+
+def populate(world, teams, per_team):
+    """
+    Purges the given teams, assigns them to the world and spawns per_team birds for each of them around a random
+    centroid. The spawns and then each controller's seed (see Controller.reseed()) are drawn from the world's random
+    stream, so the world's seed determines the whole match.
+    """
+    # assign the teams wholesale to world
+    for team in teams:
+        team.purge()
+
+    world.teams = teams
+
+    spawns = spawn(teams, per_team, world.width, world.height, world.random)
+    reseed(teams, world.random)
+
+    for team, birds in zip(teams, spawns):
+        for x, y, vx, vy in birds:
+            ent = world.makeBird(x, y)
+            ent.v = Vector2(vx, vy)
+            world.addEntity(ent, team=team)
+            ent.controller = team.controller
+            ent.controller.init(ent)
+
+def reseed(teams, rng):
+    """
+    Gives each team's controller its own random stream, seeded from rng.
+    """
+    for team in teams:
+        team.controller.reseed(rng.randint(0, values.MAX_SEED))
+
+def team_health(team):
+    """
+    Returns the summed health of the team's living members.
+    """
+    return team.health
+
+def count_survivors(world):
+    """
+    Returns the number of teams that still have health left.
+    """
+    return len([team for team in world.teams if team_health(team) > 0])
+
+def decide_winner(world):
+    """
+    Picks the healthiest team as the winner, credits it with a point and returns a (team, health) tuple.
+    """
+    teamScores = [(team, team_health(team)) for team in world.teams]
+    world.winner = max(teamScores, key=operator.itemgetter(1))
+    if world.winner:
+        world.winner[0].score += 1
+
+    return world.winner
@@ -0,0 +1,156 @@
+"""
+Neighbor data in compressed sparse row (CSR) layout.
+
+Each tick the world finds every entity's neighbors and colliders as a handful of flat arrays (see Neighborhoods)
+rather than as per-entity lists of tuples. Batched controllers read those arrays through TeamView; per-entity
+controllers still see Entity.neighbors and friends as sequences of (other, dist) tuples, Vector2 offsets and
+booleans, which are only built from the arrays when a controller actually reads them.
+"""
+import numpy as np
+from framework import kernels
+from support.euclid import Vector2
+
+class Neighborhoods(object):
+    """
+    Every entity's neighbors (or colliders) at once. The entries of ents[i] are entries ptr[i]:ptr[i+1] of the
+    arrays below, sorted by distance (ties by entity order):
+      ptr     -- (n+1,) offsets into the entry arrays
+      index   -- (m,) index into ents of the neighbor
+      dist    -- (m,) distance to the neighbor
+      offset  -- (m, 2) shortest vector from the entity to the neighbor (across the world's edges if need be)
+      friend  -- (m,) whether the neighbor is on the entity's team
+
+    Entities added after the neighborhoods were found (i.e. i >= n) have no entries.
+    """
+
+    def __init__(self, ents, ptr, index, dist, offset, friend):
+        self.ents = ents
+        self.ptr, self.index, self.dist, self.offset, self.friend = ptr, index, dist, offset, friend
+
+    @classmethod
+    def empty(cls, ents):
+        """
+        Neighborhoods in which nobody has any neighbors.
+        """
+        return cls(ents, np.zeros(1, dtype=int), np.zeros(0, dtype=int), np.zeros(0),
+                   np.zeros((0, 2)), np.zeros(0, dtype=bool))
+
+    @classmethod
+    def from_entries(cls, ents, owner, index, dist, offset, friend, k=0):
+        """
+        Builds neighborhoods from unsorted entries, entry e being ents[index[e]] as a neighbor of ents[owner[e]].
+
+        A k above 0 keeps only (at most) the k nearest entries of each entity, ties going to the lowest index; they're
+        picked out before sorting, so only the entries that are kept get sorted.
+        """
+        if k > 0:
+            keep = nearest_entries(owner, index, dist, len(ents), k)
+            owner, index, dist, offset, friend = owner[keep], index[keep], dist[keep], offset[keep], friend[keep]
+
+        order = np.lexsort((index, dist, owner))
+        ptr = np.zeros(len(ents) + 1, dtype=int)
+        np.cumsum(np.bincount(owner, minlength=len(ents)), out=ptr[1:])
+        return cls(ents, ptr, index[order], dist[order], offset[order], friend[order])
+
+    def gather(self, rows):
+        """
+        Returns the ptr of the given entities' neighborhoods laid end to end, along with the indices of their entries
+        in the arrays above (for picking out their dist/offset/... with).
+        """
+        starts = self.ptr[rows]
+        counts = self.ptr[rows + 1] - starts
+
+        ptr = np.zeros(len(rows) + 1, dtype=int)
+        np.cumsum(counts, out=ptr[1:])
+        return ptr, np.repeat(starts - ptr[:-1], counts) + np.arange(ptr[-1])
+
+    def unique_pairs(self):
+        """
+        Returns every pair in here once, in the form kernels.collision_response() takes them (and in the order
+        kernels.colliding_pairs() finds them in): the indices of the first and second entity of each pair, ordered by
+        first then second, the offset from the first to the second, and the index of each entity's nearest neighbor
+        here (or -1 if it has none).
+        """
+        owner = np.repeat(np.arange(len(self.ptr) - 1), np.diff(self.ptr))
+        once = np.flatnonzero(owner < self.index)
+        once = once[np.lexsort((self.index[once], owner[once]))]
+
+        nearest = np.where(np.diff(self.ptr) > 0, self.index[np.minimum(self.ptr[:-1], len(self.index) - 1)], -1)
+        return owner[once], self.index[once], self.offset[once], nearest
+
+    # per-entity sequence views, see Entity.neighbors and friends
+    def pairs(self, i): return PairRow(self, i)
+    def offsets(self, i): return OffsetRow(self, i)
+    def friends(self, i): return FriendRow(self, i)
+
+def nearest_entries(owner, index, dist, rows, k):
+    """
+    Returns the mask of the (unsorted) entries that are among the k nearest of their owner's, ties going to the lowest
+    index. Only the rows with more than k entries are narrowed down, by partial selection (see kernels.nearest()).
+    """
+    keep = np.ones(len(owner), dtype=bool)
+    crowded = np.flatnonzero(np.bincount(owner, minlength=rows)[owner] > k)
+    if not len(crowded):
+        return keep
+
+    # lay the crowded rows out side by side, each padded to the longest and in index order (which is how
+    # kernels.nearest() breaks ties); the entries only need grouping for that, not sorting by distance
+    crowded = crowded[np.argsort(owner[crowded] * rows + index[crowded])]
+    row = np.unique(owner[crowded], return_inverse=True)[1]
+    counts = np.bincount(row)
+    starts = np.cumsum(counts) - counts
+    column = np.arange(len(crowded)) - starts[row]
+
+    padded = np.full((len(counts), counts.max()), np.inf)
+    padded[row, column] = dist[crowded]
+    filled = np.zeros(padded.shape, dtype=bool)
+    filled[row, column] = True
+
+    keep[crowded] = kernels.nearest(padded, filled, k)[row, column]
+    return keep
+
+class Row(object):
+    """
+    Read-only sequence view of one entity's entries in a Neighborhoods. It supports len(), iteration and indexing
+    like the list it stands in for, which it builds from the arrays whenever it's read.
+    """
+
+    def __init__(self, neighborhoods, i):
+        self.neighborhoods = neighborhoods
+        ptr = neighborhoods.ptr
+        self.start, self.end = (ptr[i], ptr[i+1]) if i + 1 < len(ptr) else (0, 0)
+
+    def __len__(self):
+        return int(self.end - self.start)
+
+    def __iter__(self):
+        return iter(self._items())
+
+    def __getitem__(self, k):
+        return self._items()[k]
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return repr(self._items())
+
+class PairRow(Row):
+    # (other, dist) tuples, as in the old neighbors/colliders lists
+    def _items(self):
+        nb, s, e = self.neighborhoods, self.start, self.end
+        ents = nb.ents
+        return [(ents[j], dist) for j, dist in zip(nb.index[s:e].tolist(), nb.dist[s:e].tolist())]
+
+class OffsetRow(Row):
+    # Vector2 offsets, as in the old neighbor_offsets/collider_offsets lists
+    def _items(self):
+        return [Vector2(dx, dy) for dx, dy in self.neighborhoods.offset[self.start:self.end].tolist()]
+
+class FriendRow(Row):
+    # booleans, as in the old neighbor_is_friend list
+    def _items(self):
+        return self.neighborhoods.friend[self.start:self.end].tolist()
@@ -0,0 +1,205 @@
+"""
+Batched drawing of a world's birds and hit markers. Every bird (or digit of a hit marker) is a textured quad in a
+single vertex list, and each frame rewrites the whole list from array state with a handful of whole-array
+operations, rather than updating a pyglet sprite or label per bird or marker.
+
+Importing this module needs a GL context, so only worlds that aren't headless do.
+"""
+import numpy as np
+import pyglet
+from pyglet.gl import GL_QUADS, GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA
+from pyglet.sprite import SpriteGroup
+from framework import kernels, values
+
+DEAD_COLOR = (200, 200, 200) # color of dead birds (they're sad and gray)
+DEAD_OPACITY = 100 # opacity of dead birds
+SELECTED_SCALE = 1.8 # how much bigger the selected bird is drawn
+
+HIT_MARKER_FONT = ("Small Fonts", 7.0) # font name and size hit markers are drawn in (bold)
+HIT_MARKER_CHARS = "0123456789-" # every character a hit marker can show
+HIT_MARKER_DIGITS = 4 # most characters a hit marker shows; longer values are cut short
+
+class BirdRenderer(object):
+    """
+    Draws all of a world's birds with the given image, through the given batch. Birds look exactly like the sprites
+    they replace: tinted with their team color and color masks, red while damage is debouncing, gray and faded once
+    dead, rotated to their heading and scaled up when selected.
+    """
+
+    def __init__(self, img, batch):
+        self.batch = batch
+        self.texture = img.get_texture()
+        self.group = SpriteGroup(self.texture, GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+
+        # the corners of the quad around the image's anchor, in the order pyglet sprites use
+        x1, y1 = -img.anchor_x, -img.anchor_y
+        x2, y2 = x1 + img.width, y1 + img.height
+        self.corners = np.array([(x1, y1), (x2, y1), (x2, y2), (x1, y2)], dtype=float)
+
+        self.vertex_list = None
+        self.count = 0
+        self.base_colors = None
+
+    def draw(self, world, alpha=1.0):
+        """
+        Rewrites the vertex list from the world's current state (see World.draw() for alpha); the batch then draws it.
+        """
+        ents = world.ents
+        if len(ents) != self.count:
+            self._resize(ents)
+        if not self.count: return
+
+        pos, vel, health, debounce = world.getDrawState()
+        pos = self._interpolated(world, pos, alpha)
+
+        # rotate and scale each quad by its bird's heading (see Entity.heading) and selection
+        heading = (np.arctan2(vel[:, 0], vel[:, 1]) + np.pi) / (np.pi * 2.0) * 360.0 + 180.0
+        r = -np.radians(heading)
+        cr, sr = np.cos(r)[:, np.newaxis], np.sin(r)[:, np.newaxis]
+
+        scale = np.ones(self.count)
+        if world.chosen_ent in ents:
+            scale[ents.index(world.chosen_ent)] = SELECTED_SCALE
+
+        cx = self.corners[:, 0] * scale[:, np.newaxis]
+        cy = self.corners[:, 1] * scale[:, np.newaxis]
+        vertices = np.stack([cx*cr - cy*sr + pos[:, 0:1], cx*sr + cy*cr + pos[:, 1:2]], axis=-1)
+
+        colors = self._colors(ents, health, debounce)
+
+        # and upload both in one bulk copy each
+        np.ctypeslib.as_array(self.vertex_list.vertices)[:] = vertices.ravel()
+        np.ctypeslib.as_array(self.vertex_list.colors)[:] = np.repeat(colors, 4, axis=0).ravel()
+
+    # ====================================================
+    # === Internal Methods
+    # ====================================================
+
+    def _resize(self, ents):
+        # (re)allocate four vertices per bird, textured with our image
+        self.count = len(ents)
+        if self.vertex_list is None:
+            self.vertex_list = self.batch.add(4 * self.count, GL_QUADS, self.group, 'v2f/stream', 'c4B/stream', 't3f')
+        else:
+            self.vertex_list.resize(4 * self.count)
+
+        np.ctypeslib.as_array(self.vertex_list.tex_coords)[:] = np.tile(self.texture.tex_coords, self.count)
+        self.base_colors = np.array([me.base_color for me in ents], dtype=float).reshape(-1, 3)
+
+    def _interpolated(self, world, pos, alpha):
+        # alpha of the way from where everyone was before the last tick, the short way around if they wrapped
+        if alpha >= 1.0 or world.prev_pos is None or len(world.prev_pos) != self.count:
+            return pos
+
+        prev = np.asarray(world.prev_pos, dtype=float)
+        delta = pos - prev
+        kernels.min_image(delta, world.width, world.height)
+        blended = prev + delta * alpha
+        kernels.wrap(blended, world.width, world.height)
+        return blended
+
+    def _colors(self, ents, health, debounce):
+        # the team color plus each bird's color masks, plus one for damage debouncing; like the sprites did, the
+        # masks only ever add to the red and green channels
+        tint = np.zeros((self.count, 3))
+        for i, me in enumerate(ents):
+            if me.color_masks:
+                tint[i] = np.sum(me.color_masks.values(), axis=0)
+        tint[:, 0] += 255.0 * np.maximum(debounce, 0) / float(values.DAMAGE_DEBOUNCE_MAX)
+        tint[:, 2] = 0.0
+
+        colors = np.empty((self.count, 4), dtype=np.uint8)
+        colors[:, :3] = np.minimum(self.base_colors + tint, 255.0)
+        colors[:, 3] = 255
+
+        dead = health <= 0
+        colors[dead, :3] = DEAD_COLOR
+        colors[dead, 3] = DEAD_OPACITY
+        return colors
+
+class HitMarkers(object):
+    """
+    A fixed-size pool of the damage numbers that float up from collisions, drawn through the given batch. Markers
+    look like the labels they replace: white, bold, centered on where the hit happened, drifting by their scatter
+    every frame and fading out over values.HIT_MAX_TTL frames.
+
+    Each marker is up to HIT_MARKER_DIGITS quads textured from the font's glyphs, which are rasterized once up front.
+    Once all capacity markers are in use, adding another one recycles the oldest.
+    """
+
+    def __init__(self, batch, capacity=values.HIT_MARKER_CAPACITY):
+        self.capacity = capacity
+
+        # rasterize every character we'll need once; they all end up in the same texture of the font's
+        font = pyglet.font.load(HIT_MARKER_FONT[0], HIT_MARKER_FONT[1], bold=True)
+        glyphs = font.get_glyphs(HIT_MARKER_CHARS)
+        if len(set(glyph.owner for glyph in glyphs)) != 1:
+            raise Exception("Hit marker glyphs didn't fit into a single texture")
+        self.glyphs = dict(zip(HIT_MARKER_CHARS, glyphs))
+        self.group = SpriteGroup(glyphs[0].owner, GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+
+        # per marker: where it is, how it drifts and how many frames it has left; slots are handed out round robin,
+        # so the next one is always the oldest
+        self.pos = np.zeros((capacity, 2))
+        self.scatter = np.zeros((capacity, 2))
+        self.ttl = np.zeros(capacity, dtype=int)
+        self.next = 0
+
+        # and the (left, bottom, right, top) of each of its quads relative to its position
+        self.quads = np.zeros((capacity, HIT_MARKER_DIGITS, 4))
+
+        quads = capacity * HIT_MARKER_DIGITS
+        self.vertex_list = batch.add(4 * quads, GL_QUADS, self.group, 'v2f/stream', 'c4B/stream', 't3f/dynamic')
+        np.ctypeslib.as_array(self.vertex_list.colors)[:] = 255
+
+    def add(self, x, y, text, scatter):
+        """
+        Shows text (a damage value) floating up from (x, y), drifting by scatter (dx, dy) each frame.
+        """
+        slot = self.next
+        self.next = (self.next + 1) % self.capacity
+
+        self.pos[slot] = (x, y)
+        self.scatter[slot] = scatter
+        self.ttl[slot] = values.HIT_MAX_TTL
+
+        # lay the glyphs out along the baseline, centered on x like the labels' anchor_x="center"
+        glyphs = [self.glyphs[c] for c in str(text)[:HIT_MARKER_DIGITS] if c in self.glyphs]
+        pen = -sum(glyph.advance for glyph in glyphs) / 2.0
+
+        self.quads[slot] = 0.0
+        tex_coords = np.zeros((HIT_MARKER_DIGITS, 12))
+        for k, glyph in enumerate(glyphs):
+            left, bottom, right, top = glyph.vertices
+            self.quads[slot, k] = (pen + left, bottom, pen + right, top)
+            tex_coords[k] = glyph.tex_coords
+            pen += glyph.advance
+
+        per_slot = HIT_MARKER_DIGITS * 12
+        np.ctypeslib.as_array(self.vertex_list.tex_coords)[slot*per_slot:(slot+1)*per_slot] = tex_coords.ravel()
+
+    def draw(self):
+        """
+        Rewrites the vertex list from the markers' current state, for the batch to draw.
+        """
+        live = self.ttl > 0
+
+        # quads of markers that have faded out (and unused digits) collapse to nothing
+        x = self.pos[:, 0, np.newaxis, np.newaxis] + self.quads[:, :, [0, 2, 2, 0]]
+        y = self.pos[:, 1, np.newaxis, np.newaxis] + self.quads[:, :, [1, 1, 3, 3]]
+        vertices = np.stack([x, y], axis=-1) * live[:, np.newaxis, np.newaxis, np.newaxis]
+
+        # fading out as they go, starting from fully opaque
+        alpha = np.where(live, 255.0 * (self.ttl + 1) / float(values.HIT_MAX_TTL), 0)
+        colors = np.ctypeslib.as_array(self.vertex_list.colors).reshape(self.capacity, -1, 4)
+        colors[:, :, 3] = np.minimum(alpha, 255.0)[:, np.newaxis]
+
+        np.ctypeslib.as_array(self.vertex_list.vertices)[:] = vertices.ravel()
+
+    def advance(self):
+        """
+        Moves every marker along by its scatter and brings it a frame closer to disappearing.
+        """
+        live = self.ttl > 0
+        self.pos[live] += self.scatter[live]
+        self.ttl[live] -= 1
@@ -0,0 +1,437 @@
+"""
+Broadphases for finding which entities are near each other.
+
+Each broadphase takes a list of (x, y) points and a radius, and returns every unordered pair of points within that
+radius of each other as (i, j, dx, dy, dist) tuples with i < j. World._calc_collisions() turns those pairs into each
+entity's neighbors/colliders lists, so all broadphases are interchangeable.
+
+The world is a torus (Entity.integrate() wraps positions around its edges), so distances are minimum-image ones:
+(dx, dy) is the shortest offset from point i to point j, possibly across an edge, and dist is its length. Lengths
+are measured as sqrt(dx*dx + dy*dy), which is what the whole-array versions in framework.kernels (and the ensembles)
+compute too, down to the last bit.
+"""
+import heapq
+import math
+import numpy as np
+from framework import kernels, values
+
+ROUNDING_SLACK = 1e-9 # relative margin VerletList's whole-array distance test allows for rounding differences
+BUILD_CHUNK = 256 # number of points VerletList tests against all the others at once when rebuilding
+
+def wrap_delta(d, size):
+    """
+    Maps a difference of two coordinates onto the shortest equivalent one on a wrapped axis of the given size.
+    """
+    d %= size
+    if d > size * 0.5:
+        d -= size
+    return d
+
+def interval_gap(a0, a1, b0, b1, size):
+    """
+    The shortest distance between the intervals [a0, a1] and [b0, b1] of a wrapped axis of the given size (0 if they
+    overlap), going whichever way around is shorter.
+    """
+    if b0 > a1:
+        return min(b0 - a1, a0 + size - b1)
+    if a0 > b1:
+        return min(a0 - b1, b0 + size - a1)
+    return 0.0
+
+class BruteForce(object):
+    """
+    Tests every pair of points against each other. O(n^2), but simple enough to serve as the reference the other
+    broadphases are checked against.
+    """
+
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+
+    def pairs(self, points, radius):
+        found = []
+        for i in xrange(len(points)):
+            x, y = points[i]
+            for j in xrange(i+1, len(points)):
+                dx = wrap_delta(points[j][0] - x, self.width)
+                dy = wrap_delta(points[j][1] - y, self.height)
+                dist = math.sqrt(dx*dx + dy*dy)
+                if dist <= radius:
+                    found.append((i, j, dx, dy, dist))
+
+        return found
+
+class SpatialHash(object):
+    """
+    Buckets points into a uniform grid of cells at least cell_size wide and only tests points in the same or adjacent
+    cells, so each query costs O(n * density) rather than O(n^2).
+
+    The grid covers the world exactly and wraps around at its edges, so the cells along one edge are adjacent to
+    those along the opposite edge. Together with minimum-image distances that finds neighbors across the seams
+    without having to insert ghost copies of the points near them.
+    """
+
+    def __init__(self, width, height, cell_size=values.VISION_RADIUS):
+        self.width, self.height = width, height
+        self.cell_size = cell_size
+
+    def pairs(self, points, radius):
+        # cells must be at least as wide as the radius so that anything within it lies in an adjacent cell
+        cols, rows = self._dims(max(self.cell_size, radius))
+        cell_w, cell_h = self.width/float(cols), self.height/float(rows)
+
+        # bucket every point into its cell
+        cells = {}
+        for i, (x, y) in enumerate(points):
+            key = (int(x // cell_w) % cols, int(y // cell_h) % rows)
+            cells.setdefault(key, []).append(i)
+
+        width, height = self.width, self.height
+        found = []
+        for (cx, cy), members in cells.iteritems():
+            # the 3x3 block of cells around us, wrapped around the edges (and without repeats on tiny grids)
+            adjacent = set(((cx + dx) % cols, (cy + dy) % rows) for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+
+            for key in adjacent:
+                others = cells.get(key)
+                if not others: continue
+
+                for i in members:
+                    x, y = points[i]
+                    for j in others:
+                        # each unordered pair is seen from both of its cells; only keep it from one side
+                        if j <= i: continue
+
+                        dx = wrap_delta(points[j][0] - x, width)
+                        dy = wrap_delta(points[j][1] - y, height)
+                        dist = math.sqrt(dx*dx + dy*dy)
+                        if dist <= radius:
+                            found.append((i, j, dx, dy, dist))
+
+        return found
+
+    def _dims(self, cell_size):
+        # the number of whole cells of at least cell_size that fit along each axis
+        return max(int(self.width // cell_size), 1), max(int(self.height // cell_size), 1)
+
+class SweepAndPrune(object):
+    """
+    Keeps the points sorted along x and sweeps along that order, only testing points less than radius apart in x.
+
+    The order is kept from one query to the next and repaired with an insertion sort, which is cheap because birds
+    only move a little each tick; that relies on points being the same entities from query to query as long as there
+    are as many of them (as with World._calc_collisions()), and the order is sorted from scratch whenever their number
+    changes. The sweep wraps around the world's edge, so points near x = 0 and x = width are tested against each other.
+    Unlike a grid, it doesn't get slower when birds pack tightly into a few cells, only when they line up in x.
+    """
+
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        self.order = []
+
+    def pairs(self, points, radius):
+        xs = [x for x, y in points]
+        ys = [y for x, y in points]
+        order = self._sorted(xs)
+        n = len(order)
+
+        width, height = self.width, self.height
+        reach = radius * (1.0 + ROUNDING_SLACK)
+        found = []
+        for a in xrange(n):
+            i = order[a]
+            x, y = xs[i], ys[i]
+            # walk on along the order (around the edge if need be) for as long as we're within radius in x
+            for b in xrange(a + 1, a + n):
+                j = order[b % n]
+                gap = xs[j] - x if b < n else xs[j] + width - x
+                if gap > radius: break
+
+                # if the world's so narrow that the pair is also within radius the other way around, it's found from
+                # both its points; only keep it from the first of them
+                if width - gap <= radius and b >= n: continue
+
+                # most of those are too far apart in y (wrapped); skip them before measuring them properly
+                gap_y = abs(ys[j] - y)
+                if gap_y > reach and height - gap_y > reach: continue
+
+                lo, hi = (i, j) if i < j else (j, i)
+                dx = wrap_delta(points[hi][0] - points[lo][0], width)
+                dy = wrap_delta(points[hi][1] - points[lo][1], height)
+                dist = math.sqrt(dx*dx + dy*dy)
+                if dist <= radius:
+                    found.append((lo, hi, dx, dy, dist))
+
+        return found
+
+    # ====================================================
+    # === Internal Methods
+    # ====================================================
+
+    def _sorted(self, xs):
+        # bring the order of the last query up to date with an insertion sort, or sort from scratch if it's stale
+        order = self.order
+        if len(order) != len(xs):
+            order = self.order = sorted(xrange(len(xs)), key=xs.__getitem__)
+            return order
+
+        for k in xrange(1, len(order)):
+            i = order[k]
+            x = xs[i]
+            m = k
+            while m > 0 and xs[order[m-1]] > x:
+                order[m] = order[m-1]
+                m -= 1
+            order[m] = i
+
+        return order
+
+class QuadTree(object):
+    """
+    Adaptive hierarchical index: the world is split into quadrants, and every quadrant holding more than leaf_size
+    points is split again (at most max_depth times, in case points coincide). Dense flocks thus end up spread over
+    many small leaves and sparse regions in a few big ones, which keeps the cost per point about the same however
+    tightly the controllers pack the birds, where a uniform grid piles hundreds of them into a handful of cells.
+
+    pairs() builds the tree from the given points and tests the points of each leaf against those of the leaves
+    within radius of it. Once built (by pairs() or build()), within() and nearest() answer radius and nearest
+    neighbor queries about any position. Distances between boxes, like those between points, are measured on the
+    torus, so all of these see across the world's edges.
+    """
+
+    def __init__(self, width, height, leaf_size=16, max_depth=16):
+        self.width, self.height = width, height
+        self.leaf_size, self.max_depth = leaf_size, max_depth
+        self.points = []
+        self.root = None
+        self.leaves = []
+
+    def build(self, points):
+        """
+        (Re)builds the tree over the given (x, y) points.
+        """
+        self.points = points
+        self.leaves = []
+        self.root = self._node(0.0, 0.0, float(self.width), float(self.height), range(len(points)), 0)
+
+    def pairs(self, points, radius):
+        self.build(points)
+
+        width, height = self.width, self.height
+        reach = radius * (1.0 + ROUNDING_SLACK)
+        found = []
+        for leaf in self.leaves:
+            for other in self._leaves_near(leaf.x0, leaf.y0, leaf.x1, leaf.y1, radius):
+                # each pair of leaves is tested once, from the one built first
+                if other.number < leaf.number: continue
+
+                for k, i in enumerate(leaf.members):
+                    x, y = points[i]
+                    for j in (leaf.members[k+1:] if other is leaf else other.members):
+                        # skip those clearly too far apart along either (wrapped) axis before measuring properly
+                        gap_x, gap_y = abs(points[j][0] - x), abs(points[j][1] - y)
+                        if (gap_x > reach and width - gap_x > reach) or (gap_y > reach and height - gap_y > reach):
+                            continue
+
+                        lo, hi = (i, j) if i < j else (j, i)
+                        dx = wrap_delta(points[hi][0] - points[lo][0], width)
+                        dy = wrap_delta(points[hi][1] - points[lo][1], height)
+                        dist = math.sqrt(dx*dx + dy*dy)
+                        if dist <= radius:
+                            found.append((lo, hi, dx, dy, dist))
+
+        return found
+
+    def within(self, x, y, radius):
+        """
+        Returns every built point within radius of (x, y) as (j, dx, dy, dist) tuples sorted by dist (ties by j),
+        (dx, dy) being the shortest offset from (x, y) to point j.
+        """
+        found = []
+        for leaf in self._leaves_near(x, y, x, y, radius):
+            for j in leaf.members:
+                dx, dy, dist = self._offset(x, y, j)
+                if dist <= radius:
+                    found.append((dist, j, dx, dy))
+
+        return [(j, dx, dy, dist) for dist, j, dx, dy in sorted(found)]
+
+    def nearest(self, x, y, k=1, exclude=None):
+        """
+        Returns the k built points nearest to (x, y), leaving out point exclude (e.g. the one at (x, y) itself), as
+        (j, dx, dy, dist) tuples sorted by dist (ties by j).
+
+        Nodes are visited nearest first and points are returned as soon as nothing left unvisited can be nearer, so
+        only the part of the tree around (x, y) gets looked at.
+        """
+        found = []
+        if self.root is None: return found
+
+        # nodes go in as (dist, 1, number, node) and points as (dist, 0, j, offset); at equal distances points come
+        # out first, as nothing inside a node can be nearer than the node itself
+        heap = [(0.0, 1, 0, self.root)]
+        counter = 1
+        while heap and len(found) < k:
+            dist, is_node, j, item = heapq.heappop(heap)
+            if not is_node:
+                found.append((j, item[0], item[1], dist))
+                continue
+
+            if item.children is None:
+                for j in item.members:
+                    if j == exclude: continue
+                    dx, dy, dist = self._offset(x, y, j)
+                    heapq.heappush(heap, (dist, 0, j, (dx, dy)))
+            else:
+                for child in item.children:
+                    heapq.heappush(heap, (math.sqrt(self._box_dist2(x, y, x, y, child)), 1, counter, child))
+                    counter += 1
+
+        return found
+
+    # ====================================================
+    # === Internal Methods
+    # ====================================================
+
+    def _node(self, x0, y0, x1, y1, members, depth):
+        # the node covering [x0, x1) x [y0, y1), split further if it holds too many points
+        if len(members) <= self.leaf_size or depth >= self.max_depth:
+            leaf = QuadNode(x0, y0, x1, y1, members=members, number=len(self.leaves))
+            self.leaves.append(leaf)
+            return leaf
+
+        mx, my = (x0 + x1) * 0.5, (y0 + y1) * 0.5
+        quadrants = [[], [], [], []]
+        for i in members:
+            x, y = self.points[i]
+            quadrants[(x >= mx) + 2 * (y >= my)].append(i)
+
+        boxes = [(x0, y0, mx, my), (mx, y0, x1, my), (x0, my, mx, y1), (mx, my, x1, y1)]
+        children = [self._node(bx0, by0, bx1, by1, quadrant, depth + 1)
+                    for (bx0, by0, bx1, by1), quadrant in zip(boxes, quadrants) if quadrant]
+        return QuadNode(x0, y0, x1, y1, children=children)
+
+    def _leaves_near(self, x0, y0, x1, y1, radius):
+        # every leaf whose box is within radius of the box [x0, x1] x [y0, y1] (a little more, to be safe from
+        # rounding, as the points in them get measured exactly anyway)
+        reach = (radius * (1.0 + ROUNDING_SLACK))**2
+        near = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            if self._box_dist2(x0, y0, x1, y1, node) > reach: continue
+            if node.children is None:
+                near.append(node)
+            else:
+                stack.extend(node.children)
+
+        return near
+
+    def _box_dist2(self, x0, y0, x1, y1, node):
+        # the squared shortest distance between the box [x0, x1] x [y0, y1] and the node's, on the torus
+        gap_x = interval_gap(x0, x1, node.x0, node.x1, self.width)
+        gap_y = interval_gap(y0, y1, node.y0, node.y1, self.height)
+        return gap_x**2 + gap_y**2
+
+    def _offset(self, x, y, j):
+        # the shortest offset from (x, y) to point j, and its length
+        dx = wrap_delta(self.points[j][0] - x, self.width)
+        dy = wrap_delta(self.points[j][1] - y, self.height)
+        return dx, dy, math.sqrt(dx*dx + dy*dy)
+
+class QuadNode(object):
+    """
+    A node of a QuadTree, covering [x0, x1) x [y0, y1). Inner nodes have children (only the non-empty ones); leaves
+    have members, the indices of the points in them, and are numbered in the order they were built.
+    """
+
+    def __init__(self, x0, y0, x1, y1, children=None, members=None, number=None):
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+        self.children, self.members, self.number = children, members, number
+
+class VerletList(object):
+    """
+    Reuses candidate pairs across ticks, Verlet list style: pairs are looked for out to radius + skin, and until some
+    two points have moved more than the skin between them since then, every pair within radius must still be among
+    them. Each query only re-measures those candidate pairs and keeps the ones actually within radius, so it finds
+    exactly what the other broadphases would have.
+
+    The candidates are rebuilt by testing all pairs at once with whole-array operations (in chunks of BUILD_CHUNK
+    points), or by the given broadphase if there is one.
+
+    Points are taken to be the same entities from one query to the next as long as there are as many of them (as
+    with World._calc_collisions(), whose living entities only ever go away); the candidates are rebuilt whenever the
+    number of points or the radius changes.
+    """
+
+    def __init__(self, width, height, skin=values.NEIGHBOR_SKIN, broadphase=None):
+        self.width, self.height = width, height
+        self.skin = skin
+        self.broadphase = broadphase
+
+        # where everyone was and which pairs were within radius + skin as of the last rebuild
+        self.built_pos = None
+        self.built_radius = None
+        self.first = self.second = np.zeros(0, dtype=int)
+
+        # how many times the candidates have been rebuilt, for benchmarking
+        self.builds = 0
+
+    def pairs(self, points, radius):
+        pos = np.array(points, dtype=float).reshape(-1, 2)
+        if self._stale(pos, radius):
+            self._build(pos, radius)
+
+        # re-measure the candidate pairs where everyone is now and narrow them down to the ones (about) within range
+        delta = pos[self.second] - pos[self.first]
+        kernels.min_image(delta, self.width, self.height)
+        close = np.flatnonzero((delta**2).sum(axis=1) <= (radius * (1.0 + ROUNDING_SLACK))**2)
+
+        # then measure those exactly like the other broadphases do, down to the last bit, so that swapping one for
+        # the other never changes how a match plays out
+        found = []
+        for i, j, dx, dy in zip(self.first[close].tolist(), self.second[close].tolist(),
+                                delta[close, 0].tolist(), delta[close, 1].tolist()):
+            dist = math.sqrt(dx*dx + dy*dy)
+            if dist <= radius:
+                found.append((i, j, dx, dy, dist))
+
+        return found
+
+    # ====================================================
+    # === Internal Methods
+    # ====================================================
+
+    def _stale(self, pos, radius):
+        # whether the candidates may be missing some pair within radius
+        if self.built_pos is None or len(pos) != len(self.built_pos) or radius != self.built_radius:
+            return True
+        if len(pos) < 2:
+            return False
+
+        # no pair can have closed in by more than the two longest distances anyone has moved put together
+        moved = pos - self.built_pos
+        kernels.min_image(moved, self.width, self.height)
+        moved = np.partition((moved**2).sum(axis=1), len(moved) - 2)[-2:]
+        return np.sqrt(moved).sum() > self.skin
+
+    def _build(self, pos, radius):
+        # find every pair within radius + skin from scratch
+        reach = radius + self.skin
+        if self.broadphase:
+            found = self.broadphase.pairs(pos.tolist(), reach)
+            self.first = np.array([i for i, j, dx, dy, dist in found], dtype=int)
+            self.second = np.array([j for i, j, dx, dy, dist in found], dtype=int)
+        else:
+            first, second = [np.zeros(0, dtype=int)], [np.zeros(0, dtype=int)]
+            for start in xrange(0, len(pos), BUILD_CHUNK):
+                delta = pos[np.newaxis, :, :] - pos[start:start+BUILD_CHUNK, np.newaxis, :]
+                kernels.min_image(delta, self.width, self.height)
+                rows, cols = np.nonzero((delta**2).sum(axis=-1) <= reach**2)
+                rows += start
+                first.append(rows[rows < cols])
+                second.append(cols[rows < cols])
+            self.first, self.second = np.concatenate(first), np.concatenate(second)
+
+        self.built_pos = pos
+        self.built_radius = radius
+        self.builds += 1
@@ -1,21 +1,87 @@
-import colorsys
-from support.helpers import rgb_scaled
-
-__author__ = 'Faisal'
-
-class Team(object):
-    def __init__(self, name, controller):
-        self.name = name
-        self.controller = controller
-        self.score = 0
-        self.match_score = 0
-        self.members = []
-
-        # create a (hopefully) unique color for the team by their name
-        teamColor = (name.__hash__() % 500)/500.0
-        self.color = rgb_scaled(colorsys.hsv_to_rgb(teamColor, 1.0, 1.0))
-
-    def purge(self):
-        self.match_score = 0
-        self.members = []
-        self.controller.purge()
+import colorsys
+from support.euclid import Vector2
+from support.helpers import rgb_scaled
+
+__author__ = 'Faisal'
+
+class Team(object):
+    def __init__(self, name, controller):
+        self.name = name
+        self.controller = controller
+        self.score = 0
+        self.match_score = 0
+        self.members = []
+
+        # create a (hopefully) unique color for the team by their name
+        teamColor = (name.__hash__() % 500)/500.0
+        self.color = rgb_scaled(colorsys.hsv_to_rgb(teamColor, 1.0, 1.0))
+
+        self._reset()
+
+    def purge(self):
+        self.match_score = 0
+        self.members = []
+        self._reset()
+        self.controller.purge()
+
+    # ====================================================
+    # === Live aggregates
+    # ====================================================
+    # alive (the number of living members) and health (their summed health) are kept up to date by the world as
+    # members are added, hurt and killed, and the centroid and mean velocity of the living members every time the
+    # world integrates, so reading any of them is O(1)
+
+    def getCentroid(self):
+        return self._pos_sum / self.alive if self.alive else Vector2()
+    centroid = property(getCentroid)
+
+    def getMeanVelocity(self):
+        return self._vel_sum / self.alive if self.alive else Vector2()
+    mean_velocity = property(getMeanVelocity)
+
+    def addMember(self, me):
+        """
+        Adds a bird to the team and to its aggregates.
+        """
+        self.members.append(me)
+        if not me.dead:
+            self.alive += 1
+            self.health += me.health
+            self._pos_sum += me.pos
+            self._vel_sum += me.v
+
+    def hurt(self, me, dmg):
+        """
+        Takes dmg off one of our members' health, and off our aggregates with it.
+        """
+        was_alive, before = not me.dead, me.health
+        me.health -= dmg
+        if not was_alive: return
+
+        if me.dead:
+            # the dead no longer count towards anything
+            self.alive -= 1
+            self.health -= before
+            self._pos_sum -= me.pos
+            self._vel_sum -= me.v
+        else:
+            self.health -= dmg
+
+    def setVitals(self, alive, health):
+        """
+        Sets the living member count and their summed health outright, for worlds that compute them in bulk.
+        """
+        self.alive, self.health = alive, health
+
+    def setMotion(self, pos_sum, vel_sum):
+        """
+        Sets the summed positions and velocities (Vector2s) of the living members, which the world recomputes as it
+        integrates them.
+        """
+        self._pos_sum, self._vel_sum = pos_sum, vel_sum
+
+    def _reset(self):
+        self.alive = 0
+        self.health = 0
+        self._pos_sum = Vector2()
+        self._vel_sum = Vector2()
@@ -0,0 +1,92 @@
+"""
+Array views of a team's living members, handed to Controller.think_batch() so a controller can think for the whole
+team at once.
+"""
+import numpy as np
+
+class TeamView(object):
+    """
+    A snapshot of one team's living members and their neighborhoods as NumPy arrays. Row k of every per-member array
+    describes members[k].
+
+    Per member:
+      pos, vel      -- (n, 2) positions and velocities
+      health        -- (n,) health
+      mass          -- (n,) the factor World applies to the returned accelerations (see Entity.update())
+
+    Per neighbor, in compressed sparse row layout: the neighbors of members[k] are entries nbr_ptr[k]:nbr_ptr[k+1]
+    of the arrays below, sorted by distance just like Entity.neighbors.
+      nbr_ptr       -- (n+1,) offsets into the neighbor arrays
+      nbr_owner     -- (m,) which member each entry belongs to
+      nbr_dist      -- (m,) distance to the neighbor
+      nbr_offset    -- (m, 2) shortest vector from the member to the neighbor (across the world's edges if need be)
+      nbr_vel       -- (m, 2) the neighbor's velocity
+      nbr_friend    -- (m,) whether the neighbor is on our team
+
+    goal is the team's goal as a Vector2, or None if it has none.
+
+    randoms are the numpy streams the members' matches draw from (see randint()), members random_ptr[i] to
+    random_ptr[i+1] being in the match of randoms[i]; by default everyone draws from the controller's self.np_random.
+    """
+
+    def __init__(self, team, members, pos, vel, health, mass, nbr_ptr, nbr_dist, nbr_offset, nbr_vel, nbr_friend,
+                 randoms=None, random_ptr=None):
+        self.team = team
+        self.members = members
+        self.pos, self.vel, self.health, self.mass = pos, vel, health, mass
+        self.nbr_ptr = nbr_ptr
+        self.nbr_owner = np.repeat(np.arange(len(members)), np.diff(nbr_ptr))
+        self.nbr_dist, self.nbr_offset, self.nbr_vel, self.nbr_friend = nbr_dist, nbr_offset, nbr_vel, nbr_friend
+        self.goal = getattr(team, 'goal', None)
+        self.randoms = randoms if randoms is not None else [team.controller.np_random]
+        self.random_ptr = random_ptr if random_ptr is not None else np.array([0, len(members)])
+
+    def __len__(self):
+        return len(self.members)
+
+    def randint(self, low, high, rows=None, shape=()):
+        """
+        Draws shape random ints from [low, high) for each of the given members (indices into members, ascending; all
+        of them by default), each from the stream of its own match. Within a match, the draws come out exactly as a
+        single stream.randint(low, high, size=(len(rows),) + shape) would have.
+        """
+        rows = np.arange(len(self.members)) if rows is None else np.asarray(rows)
+        drawn = np.empty((len(rows),) + tuple(shape), dtype=int)
+        bounds = np.searchsorted(rows, self.random_ptr)
+        for stream, start, end in zip(self.randoms, bounds[:-1], bounds[1:]):
+            if end > start:
+                drawn[start:end] = stream.randint(low, high, size=(end - start,) + tuple(shape))
+        return drawn
+
+    # ====================================================
+    # === Segmented reductions over each member's neighbors
+    # ====================================================
+
+    def segment_sum(self, values):
+        """
+        Sums per-neighbor values ((m,) or (m, 2)) over each member's neighbors, giving (n,) or (n, 2).
+        """
+        # (bincount gives ints rather than floats when there are no neighbors at all, hence the casts)
+        n = len(self.members)
+        if values.ndim == 1:
+            return np.bincount(self.nbr_owner, weights=values, minlength=n).astype(float)
+        return np.stack([np.bincount(self.nbr_owner, weights=values[:, k], minlength=n)
+                         for k in xrange(values.shape[1])], axis=-1).astype(float)
+
+    def segment_count(self, mask):
+        """
+        Counts the neighbors of each member for which the (m,) boolean mask is set.
+        """
+        return np.bincount(self.nbr_owner[mask], minlength=len(self.members))
+
+    def segment_first(self, mask):
+        """
+        Returns, for each member, the index of its first (i.e. nearest) neighbor entry for which mask is set, or -1 if
+        there is none.
+        """
+        first = np.full(len(self.members), -1, dtype=int)
+        hits = np.flatnonzero(mask)
+        # entries are grouped by owner, so each owner's first hit is where it first shows up
+        owners, at = np.unique(self.nbr_owner[hits], return_index=True)
+        first[owners] = hits[at]
+        return first
@@ -0,0 +1,113 @@
+"""
+King-of-the-hill tournaments between two teams, with the matches of each series played in parallel by a pool of
+worker processes (each simulating its own headless world).
+
+Each round's pairing depends on who lost the round before, so only one series is ever waiting to be decided, and at
+most 2*best_of - 1 of its matches can be played at once: workers beyond that only help by starting on the next round
+while the previous round's undecided matches finish.
+"""
+import multiprocessing
+import random
+from framework import headless, values
+
+def play(job):
+    """
+    Plays a single headless match in a worker; job is a (teams, seed, match_args) tuple. Returns the index of the
+    winning team in teams along with its health, since the team objects themselves are the worker's copies.
+    """
+    teams, seed, match_args = job
+    winner = headless.run(teams=teams, randseed=seed, **match_args)
+    return teams.index(winner[0]), winner[1]
+
+def play_windowed(job):
+    """
+    Like play(), but shows the match in a window via the harness, in this process. Returns None if the window was
+    closed before the match ended.
+    """
+    # imported here, since importing pyglet's windowing needs a display
+    from framework import harness
+
+    teams, seed, match_args = job
+    winner = harness.run(teams=teams, randseed=seed, **match_args)
+    if winner:
+        return teams.index(winner[0]), winner[1]
+
+def play_until_done(job):
+    """
+    Plays a match with play_windowed() until it finishes, starting it over (on the same seed) whenever the window is
+    closed before the end, as main.py used to.
+    """
+    result = None
+    while not result:
+        result = play_windowed(job)
+    return result
+
+def run_series(pool, teams, best_of, rng, match_args):
+    """
+    Plays matches between teams[0] and teams[1] until one of them has won best_of, crediting each match's winner with
+    a point (which harness.run() already does for watched matches). Returns the list of (team, health) winners in the
+    order they count.
+
+    Matches can't be drawn, so 2*best_of - 1 matches always decide a series: all of them are dispatched to the pool
+    at once, which caps how many workers a series can use at that many. Their results are counted in order as they
+    come in, and this returns as soon as they decide the series; matches still being played then go on in the pool
+    (alongside the next round's) and are ignored. Without a pool, the matches are watched one at a time instead, and
+    only until the series is decided.
+    """
+    # (each job gets its own copy of the list, since run() replaces the loser in teams while ignored ones may still be
+    # waiting to be sent to a worker)
+    jobs = [(list(teams), rng.randint(0, values.MAX_SEED), match_args) for i in xrange(2*best_of - 1)]
+    results = pool.imap(play, jobs) if pool else (play_until_done(job) for job in jobs)
+
+    wins = [0] * len(teams)
+    winners = []
+    for index, health in results:
+        wins[index] += 1
+        # (harness.run() credited watched winners already; the workers only credited their own copies of the teams)
+        if pool:
+            teams[index].score += 1
+        winners.append((teams[index], health))
+        print "Winner: %s, health %d, score %d" % (teams[index].name, health, teams[index].score)
+        if wins[index] >= best_of: break
+
+    return winners
+
+def run(teams, make_challenger, rounds, best_of, processes=None, seed=None, watch=False, **match_args):
+    """
+    Runs the tournament main.py used to play one match at a time: for each of the given number of rounds, teams[0] and
+    teams[1] play a best_of series, after which the loser is replaced by make_challenger(index of the loser).
+
+    Matches are simulated headless by a pool of processes worker processes (one per CPU by default), of which each
+    series can keep at most 2*best_of - 1 busy (see run_series()), or watched one at a time in a window if watch is
+    set; match_args are passed through to headless.run()/harness.run(). Giving a
+    seed makes the whole tournament reproducible. Returns the last match's (team, health) winner.
+    """
+    rng = random.Random(seed)
+    pool = None if watch else multiprocessing.Pool(processes)
+
+    winner = None
+    try:
+        for currNumRounds in xrange(rounds):
+            print "round ", currNumRounds
+
+            # first to best_of wins
+            team0StartScore = teams[0].score
+            team1StartScore = teams[1].score
+
+            winners = run_series(pool, teams, best_of, rng, match_args)
+            if winners:
+                winner = winners[-1]
+
+            # now we have the winner, replace the other team
+            if teams[0].score - team0StartScore < teams[1].score - team1StartScore:
+                teams[0] = make_challenger(0)
+                print "%s wins!" % teams[1].name
+            else:
+                teams[1] = make_challenger(1)
+                print "%s wins" % teams[0].name
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    return winner
@@ -1,18 +1,26 @@
-FLOCK_SPREAD = 100 # max distance of boid from flock center at generation time
-FLOCK_INTERNAL_DIST = 20 # distance between boids at generation time
-BIRDS_PER_TEAM = 10 # number of boids per team, unless explicitly specified via argument to run()
-
-DEFAULT_MASS = 20.0 # mass of a boid -- the bigger, the slower
-VISION_RADIUS = 100.0 # distance a boid can see
-COLLISION_DIST = 16.0 # distance under which two enemy boids are considered colliding
-
-VELOCITY_DAMPING = 0.99 # velocity's multiplied by this to gradually bring boids to a stop
-VELOCITY_DAMPING_DEAD = 0.8 # damper for slowing down dead entities
-
-START_HEALTH = 100 #the health each boid has in the beginning
-COLLISION_DAMAGE_MULT = 0.1 # the multiplier of the dot product of two colliding birds' velocities
-COLLISION_DAMAGE_STATIC = 1.0 # the base amount of damage to inflict no matter what
-COLLISION_REPULSE_MULT = 32.0 # the multiplier for the impulse that separates two colliding birds
-DAMAGE_DEBOUNCE_MAX = 10 # number of frames of damage 'debouncing'
-
-HIT_MAX_TTL = 20 # number of frames to display a damage count
\ No newline at end of file
+FLOCK_SPREAD = 100 # max distance of boid from flock center at generation time
+FLOCK_INTERNAL_DIST = 20 # distance between boids at generation time
+BIRDS_PER_TEAM = 10 # number of boids per team, unless explicitly specified via argument to run()
+
+DEFAULT_MASS = 20.0 # mass of a boid -- the bigger, the slower
+VISION_RADIUS = 100.0 # distance a boid can see
+MAX_NEIGHBORS = 0 # most neighbors (the nearest ones) a boid keeps track of; 0 for everyone within VISION_RADIUS
+NEIGHBOR_SKIN = 40.0 # extra distance spatial.VerletList looks out to, so its pairs stay valid for a few ticks
+COLLISION_DIST = 16.0 # distance under which two enemy boids are considered colliding
+
+VELOCITY_DAMPING = 0.99 # velocity's multiplied by this to gradually bring boids to a stop
+VELOCITY_DAMPING_DEAD = 0.8 # damper for slowing down dead entities
+
+START_HEALTH = 100 #the health each boid has in the beginning
+COLLISION_DAMAGE_MULT = 0.1 # the multiplier of the dot product of two colliding birds' velocities
+COLLISION_DAMAGE_STATIC = 1.0 # the base amount of damage to inflict no matter what
+COLLISION_REPULSE_MULT = 32.0 # the multiplier for the impulse that separates two colliding birds
+DAMAGE_DEBOUNCE_MAX = 10 # number of frames of damage 'debouncing'
+
+HIT_MAX_TTL = 20 # number of frames to display a damage count
+HIT_MARKER_CAPACITY = 256 # most damage counts displayed at once; beyond that, the oldest are recycled
+
+SIM_DT = 1.0/60.0 # fixed timestep (in seconds) of one simulation tick
+FRAME_BUDGET = 1.0/30.0 # most real time (in seconds) the harness spends simulating between two rendered frames
+
+MAX_SEED = 2**31 - 1 # largest seed drawn for matches and for the random streams derived from a world's seed
@@ -0,0 +1,201 @@
+"""
+Plays back recorded matches (see framework.replay) in a window, without re-simulating them.
+
+The recorded state of each displayed frame is copied straight into the arrays of an ArrayWorld, which then draws
+itself as usual; no controller ever thinks. Playback runs at the display's rate whatever the speed, which can be
+changed (or reversed) on the fly, and can be paused and scrubbed:
+
+  space          -- pause/resume
+  left/right     -- seek a second back/forward (a single frame if shift is held)
+  up/down        -- double/halve the playback speed
+  backspace      -- reverse the playback direction
+  home/end       -- jump to the start/end
+  click/drag the bar at the bottom to scrub; click a bird to inspect it
+
+Run it as python -m framework.viewer some/file.rep [speed].
+"""
+import sys
+import numpy as np
+import pyglet
+from pyglet.window import mouse, key
+from framework import values
+from framework.replay import Replay
+from framework.team import Team
+from framework.arrayworld import ArrayWorld
+from support.euclid import Vector2
+from support.helpers import line
+
+SCRUB_BAR_HEIGHT = 12 # height (in pixels) of the strip along the bottom of the window that scrubs when clicked
+
+def run(path, speed=1.0):
+    replay = Replay(path)
+    if not len(replay):
+        raise Exception("%s has no frames to play" % path)
+
+    window = pyglet.window.Window(width=replay.width, height=replay.height)
+    myworld = ArrayWorld(replay.width, replay.height, capacity=max(replay.count, 1))
+
+    # rebuild the teams and their birds, which only ever get their state from the replay
+    teams = []
+    for info in replay.teams:
+        team = Team(name=info['name'], controller=None)
+        team.color = tuple(info['color'])
+        teams.append(team)
+    myworld.teams = teams
+
+    start = replay.positions(0)
+    for (x, y), team_index in zip(start.tolist(), replay.team_of.tolist()):
+        myworld.addEntity(myworld.makeBird(x, y), team=teams[team_index])
+
+    times = np.asarray(replay.frames['time'], dtype=float)
+    damage = replay.frames['damage']
+
+    # playback state: the replay's clock, its speed, and which frame is on screen
+    state = {'time': 0.0, 'speed': speed, 'paused': False, 'frame': -1}
+
+    HUDlabel = pyglet.text.Label(
+        x=5, y=window.height-5, anchor_y="top",
+        font_name="Courier New", font_size=10.0,
+        multiline=True, width=window.width,
+        color=(255,255,255,200)
+    )
+
+    HUDTeamScores = pyglet.text.Label(
+        x=5, y=SCRUB_BAR_HEIGHT + 5, anchor_y="bottom",
+        font_name="Courier New", font_size=10.0,
+        multiline=True, width=window.width,
+        color=(255,255,255,100)
+    )
+
+    def show(frame):
+        # copy the state recorded in the given frame onto the entities
+        previous, state['frame'] = state['frame'], frame
+        pos, vel, health = replay.positions(frame), replay.velocities(frame), replay.health(frame)
+
+        # rebuild the damage debounce tint from how long ago each bird was last hit
+        first = max(frame - values.DAMAGE_DEBOUNCE_MAX + 1, 0)
+        recent = damage[first:frame+1] > 0
+        since = np.where(recent.any(axis=0), np.argmax(recent[::-1], axis=0), -1)
+        debounce = np.where(since >= 0, values.DAMAGE_DEBOUNCE_MAX - since, 0)
+
+        myworld.pos[:] = pos
+        myworld.vel[:] = vel
+        myworld.health[:] = health
+        myworld.debounce[:] = debounce
+        myworld.alive[:] = health > 0
+
+        # float hit markers up from the hits in the frames we just played through (but not from the ones we skipped
+        # over when seeking, or played backwards)
+        if 0 <= previous < frame and frame - previous <= values.DAMAGE_DEBOUNCE_MAX:
+            for hit_frame in xrange(previous + 1, frame + 1):
+                hit_pos = replay.positions(hit_frame)
+                for i in np.flatnonzero(damage[hit_frame] > 0):
+                    myworld._add_hit_marker(hit_pos[i, 0], hit_pos[i, 1], int(damage[hit_frame, i]))
+
+        # also populate team info textbox
+        teamHealth = np.bincount(replay.team_of, weights=np.maximum(health, 0), minlength=len(teams))
+        teamScores = []
+        for k, team in enumerate(teams):
+            teamScores.append( "%(name)8s: %(health)4d %(bar)s" % {
+                'name': team.name,
+                'health': teamHealth[k],
+                'bar': ("*" * int(10 * teamHealth[k]/(len(team.members) * values.START_HEALTH)))
+            })
+        HUDTeamScores.text = "\n".join(teamScores)
+
+    def seek(time):
+        # move the replay's clock, clamped to the recording, and show the frame it lands on
+        state['time'] = min(max(time, times[0]), times[-1])
+        show(int(np.searchsorted(times, state['time'], side='right')) - 1)
+
+    def seek_frame(frame):
+        seek(times[min(max(frame, 0), len(times) - 1)])
+
+    @window.event
+    def on_draw():
+        window.clear()
+        myworld.draw()
+
+        # display playback info, plus info about the chosen ent if there is one
+        info = "%(time)7.2fs / %(length).2fs, frame %(frame)d, speed %(speed)gx%(paused)s" % {
+            'time': state['time'], 'length': times[-1], 'frame': replay[state['frame']]['tick'],
+            'speed': state['speed'], 'paused': " (paused)" if state['paused'] else ""
+        }
+        if myworld.chosen_ent:
+            info += """\nHealth: %(health)4d, Team: %(team)s""" % {
+                'health': myworld.chosen_ent.health,
+                'team': myworld.chosen_ent.team.name
+            }
+        HUDlabel.text = info
+        HUDlabel.draw()
+
+        # draw team info, calculated in show()
+        HUDTeamScores.draw()
+
+        # and the scrub bar, filled up to where we are
+        done = window.width * (state['time'] - times[0]) / max(times[-1] - times[0], 1e-9)
+        line(0, SCRUB_BAR_HEIGHT/2, window.width, SCRUB_BAR_HEIGHT/2, (0.3, 0.3, 0.3))
+        line(0, SCRUB_BAR_HEIGHT/2, done, SCRUB_BAR_HEIGHT/2, (1.0, 1.0, 1.0))
+
+    def scrub(x):
+        seek(times[0] + (times[-1] - times[0]) * min(max(x / float(window.width), 0.0), 1.0))
+
+    @window.event
+    def on_mouse_press(x, y, button, modifiers):
+        if button != mouse.LEFT: return
+
+        if y <= SCRUB_BAR_HEIGHT:
+            scrub(x)
+            return
+
+        # clear the previous selection's attributes, if selected
+        if myworld.chosen_ent:
+            del myworld.chosen_ent.color_masks['selected']
+            myworld.chosen_ent = None
+
+        # and find our new selection
+        for ent in myworld.ents:
+            if not ent.dead and Vector2(ent.x - x, ent.y - y).magnitude() <= 24.0:
+                myworld.chosen_ent = ent
+                myworld.chosen_ent.color_masks['selected'] = (255,255,255)
+                break
+
+    @window.event
+    def on_mouse_drag(x, y, dx, dy, buttons, modifiers):
+        if buttons & mouse.LEFT and y <= SCRUB_BAR_HEIGHT:
+            scrub(x)
+
+    @window.event
+    def on_key_press(symbol, modifiers):
+        if symbol == key.SPACE:
+            state['paused'] = not state['paused']
+        elif symbol in (key.LEFT, key.RIGHT):
+            step = -1 if symbol == key.LEFT else 1
+            if modifiers & key.MOD_SHIFT:
+                seek_frame(state['frame'] + step)
+            else:
+                seek(state['time'] + step)
+        elif symbol == key.UP:
+            state['speed'] *= 2.0
+        elif symbol == key.DOWN:
+            state['speed'] /= 2.0
+        elif symbol == key.BACKSPACE:
+            state['speed'] = -state['speed']
+        elif symbol == key.HOME:
+            seek_frame(0)
+        elif symbol == key.END:
+            seek_frame(len(times) - 1)
+
+    def update(dt):
+        # advance the replay's clock by however much real time passed, scaled by our speed
+        if not state['paused']:
+            seek(state['time'] + dt * state['speed'])
+
+    seek_frame(0)
+    pyglet.clock.schedule_interval(update, 1.0/60.0)
+
+    pyglet.app.run()
+    window.close()
+
+if __name__ == '__main__':
+    run(sys.argv[1], *[float(arg) for arg in sys.argv[2:3]])
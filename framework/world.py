@@ -1,191 +1,319 @@
-import colorsys
-from math import sqrt
-import operator
-import random
-import pyglet
-from pyglet.gl import *
-import entities
-from framework import values
-from support.euclid import Vector2
-from support.helpers import rgb_scaled, circle, line
-
-class World(object):
-    def __init__(self, width, height):
-        self.width, self.height = width, height
-        self.ents = []
-        self.batch = pyglet.graphics.Batch()
-        self.teams = {}
-
-        self.hit_markers = []
-        self.hit_marker_batch = pyglet.graphics.Batch()
-
-        # and allocate some resources
-        self.bird_img = pyglet.resource.image('res/bird.png')
-        self.bird_img.anchor_x, self.bird_img.anchor_y = 8, 8
-        self.goal_img = pyglet.resource.image('res/goal.png')
-        self.goal_img.anchor_x, self.goal_img.anchor_y = 8, 8
-
-    def addEntity(self, ent, team):
-        """
-        Adds an entity to the world.
-
-        This creates a sprite for the entity and adds it to the world's render list, as well as calls the entity's
-        update() method before each frame.
-        """
-
-        # and add the entity to its team + color it for its team
-        ent.team = team
-        ent.team.members.append(ent)
-        ent.base_color = ent.team.color
-        ent.sprite.color = ent.team.color
-
-        # and stick it in the list of things to consider
-        self.ents.append(ent)
-
-        return ent
-
-    def draw(self):
-        # draw the goals, if present
-        for team in self.teams:
-            if hasattr(team, 'goal_sprite'):
-                team.goal_sprite.draw()
-
-        # prior to drawing each ent with a color mask, its color must be updated by each mask
-        for me in [x for x in self.ents if x.color_masks]:
-            finalcolor = list(me.base_color)
-            for mask in me.color_masks.values():
-                for i in xrange(0,2): finalcolor[i] = min(finalcolor[i] + mask[i], 255)
-            me.sprite.color = tuple(finalcolor)
-
-        # and draw the boids, of course!
-        self.batch.draw()
-
-        # and draw damage indicators on top
-        self.hit_marker_batch.draw()
-
-        # and move the damage indicators up + fade them out
-        self.hit_markers = [x for x in self.hit_markers if x.ttl > 0]
-        for lbl in self.hit_markers:
-            frac = lbl.ttl/float(values.HIT_MAX_TTL)
-            # move it up a little bit
-            lbl.x += lbl.scatter[0]
-            lbl.y += lbl.scatter[1]
-            # fade it out a little bit
-            lbl.color = (255, 255, 255, int(255.0 * frac))
-
-            # decrease time-to-live and remove when it's 0
-            lbl.ttl -= 1
-            if lbl.ttl <= 0:
-                lbl.delete()
-
-
-    def update(self):
-        # compute collision sets for all entities
-        self._calc_collisions()
-
-        # once we've computed all the neighbor/collision sets, it's time to update each ent
-        for me in self.ents:
-            # we don't update dead entities
-            if me.dead: continue
-
-            # --------------------------
-            # --- entity thinking
-            # --------------------------
-
-            # computes the entity's acceleration, mostly, and usually using a controller
-            me.update()
-
-            # decrement counters, etc.
-            if me.damage_debounce > 0:
-                # decrease and set our color accordingly
-                me.damage_debounce -= 1
-                me.color_masks['debounce'] = (255.0 * (me.damage_debounce/float(values.DAMAGE_DEBOUNCE_MAX)), 0, 0)
-
-                # if we just finished debouncing, remove the mask
-                if me.damage_debounce <= 0:
-                    del me.color_masks['debounce']
-
-            # --------------------------
-            # --- collision response
-            # --------------------------
-
-            for other, dist in me.colliders:
-                # find collision midpoint, apply impulse in opposite direction
-                midpoint = (me.pos - other.pos) * 0.5
-                me.v += midpoint.normalized() * values.COLLISION_REPULSE_MULT
-                # me.v = midpoint * values.COLLISION_REPULSE_MULT
-
-                # only damage us if we're not already reeling from an earlier attack
-                if me.damage_debounce <= 0:
-                    # DAMAGE!!!
-                    dmg_val = max(int(
-                        (me.v.normalized().dot(other.v.normalized()) + 1.0) *
-                        other.v.magnitude() * values.COLLISION_DAMAGE_MULT +
-                        values.COLLISION_DAMAGE_STATIC), 0)
-
-                    # make a hit indication to float upward
-                    lbl = pyglet.text.Label(
-                        text=str(dmg_val), bold=True,
-                        batch=self.hit_marker_batch,
-                        font_size=7.0, font_name="Small Fonts",
-                        x=me.x, y=me.y, anchor_x="center", color=(255,255,255,255)
-                    )
-                    # lbl.scatter = (random.randint(-3,3), random.randint(-3,3))
-                    lbl.scatter = (random.randint(-1,1),1)
-                    lbl.ttl = values.HIT_MAX_TTL
-                    self.hit_markers.append(lbl)
-
-                    # apply damage based on the dot product of their velocities
-                    me.health -= dmg_val
-                    me.damage_debounce = values.DAMAGE_DEBOUNCE_MAX
-
-            # --------------------------
-            # --- death response
-            # --------------------------
-
-            # if we just died, make us sad and gray
-            if me.dead:
-                me.sprite.color = (200,200,200)
-                me.sprite.opacity = 100
-                # and tell our controller, too
-                me.controller.dead(me)
-
-    def integrate(self, dt):
-        # perform motion calculations and move our entities
-        for ent in self.ents:
-            ent.integrate(dt)
-
-    # ====================================================
-    # === Internal Methods
-    # ====================================================
-
-    def _calc_collisions(self):
-        # compute the neighbors for each entity
-        for me in self.ents:
-            # clear our neighbors, first off
-            me.neighbors[:] = []
-            me.colliders[:] = []
-
-            # don't consider us if we're dead
-            if me.dead: continue
-
-            for other in self.ents:
-                # and don't consider ourselves our own neighbor/collider, either
-                if me == other: continue
-                # don't consider other dead entities
-                if other.dead: continue
-
-                # finally, it's a real, live entity that might be a neighbor/collider!
-                dist = Vector2(me.x - other.x, me.y - other.y).magnitude()
-
-                if dist <= values.VISION_RADIUS:
-                    # it's within range, add it to our near list
-                    me.neighbors.append((other, dist))
-
-                if dist <= values.COLLISION_DIST and other not in me.team.members:
-                    # we're colliding!
-                    me.colliders.append((other, dist))
-
-            # sort neighbors and colliders by dist asc
-            me.neighbors = sorted(me.neighbors, key=operator.itemgetter(1))
-            me.colliders = sorted(me.colliders, key=operator.itemgetter(1))
\ No newline at end of file
+import colorsys
+from math import sqrt
+import random
+import numpy as np
+import pyglet
+import entities
+from controllers.base import thinks_in_batches
+from framework import spatial, values
+from framework.neighbors import Neighborhoods
+from framework.teamview import TeamView
+from support.euclid import Vector2
+from support.helpers import rgb_scaled
+
+class World(object):
+    def __init__(self, width, height, headless=False, broadphase=None, seed=None, max_neighbors=values.MAX_NEIGHBORS):
+        """
+        Creates an empty world of the given dimensions.
+
+        If headless is True, no graphics resources are allocated at all: nothing gets drawn, collisions produce
+        no hit markers and draw() must not be called. This is what framework.headless uses to simulate without a
+        window or GL context.
+
+        broadphase is the framework.spatial broadphase used to find neighbors and colliders; it defaults to a
+        SpatialHash over the world (a VerletList, which reuses its pairs across ticks, is usually faster over a whole
+        match; BruteForce, SweepAndPrune and QuadTree also work). Either way, entities see each other across the world's
+        (wrapped) edges.
+
+        seed seeds the world's random stream, from which the match's spawns and the controllers' own streams are drawn
+        (see match.populate()), so that a match can be replayed exactly from its seed. None seeds it from the system.
+
+        max_neighbors caps each entity's neighbors list to its nearest few (a topological neighborhood); 0 means
+        everyone within VISION_RADIUS. Colliders are never capped.
+        """
+        self.width, self.height = width, height
+        self.headless = headless
+        self.broadphase = broadphase or spatial.SpatialHash(width, height)
+        self.max_neighbors = max_neighbors
+        self.ents = []
+
+        # everyone's neighbors and colliders as of the last update (see framework.neighbors)
+        self.neighborhoods = Neighborhoods.empty(self.ents)
+        self.collisions = Neighborhoods.empty(self.ents)
+        self.teams = []
+        self.chosen_ent = None
+
+        # the simulation's random stream, plus a separate one for purely cosmetic randomness (like hit marker
+        # scatter), so that whether or not we draw doesn't change how a match plays out
+        self.random = random.Random(seed)
+        self.fx_random = random.Random(seed)
+
+        self.hit_markers = None
+
+        # everyone's (x, y) before the last integrate(), so that draw() can interpolate between ticks
+        self.prev_pos = None
+
+        if not headless:
+            self.batch = pyglet.graphics.Batch()
+            self.hit_marker_batch = pyglet.graphics.Batch()
+
+            # and allocate some resources
+            self.bird_img = pyglet.resource.image('res/bird.png')
+            self.bird_img.anchor_x, self.bird_img.anchor_y = 8, 8
+            self.goal_img = pyglet.resource.image('res/goal.png')
+            self.goal_img.anchor_x, self.goal_img.anchor_y = 8, 8
+
+            # the birds and hit markers are each drawn in one go from array state (imported here, as it needs a GL
+            # context)
+            from framework.render import BirdRenderer, HitMarkers
+            self.bird_renderer = BirdRenderer(self.bird_img, self.batch)
+            self.hit_markers = HitMarkers(self.hit_marker_batch)
+
+    def addEntity(self, ent, team):
+        """
+        Adds an entity to the world.
+
+        The entity is drawn by the world's bird renderer (unless we're headless), and its update() method is called
+        before each frame.
+        """
+
+        # and add the entity to its team + color it for its team
+        ent.team = team
+        ent.team_id = self.teamIdFor(team)
+        ent.team.addMember(ent)
+        ent.base_color = ent.team.color
+
+        # and stick it in the list of things to consider (where it'll find its neighbors by its index)
+        ent.index = len(self.ents)
+        self.ents.append(ent)
+
+        return ent
+
+    def teamIdFor(self, team):
+        """
+        Returns the team's index in self.teams, adding it there if it's new. Entities carry it as their team_id, so
+        telling friend from foe is a comparison of two ints rather than a search through a team's members.
+        """
+        if team not in self.teams:
+            self.teams.append(team)
+        return self.teams.index(team)
+
+    def makeBird(self, x, y):
+        """
+        Creates (but doesn't add) a bird of the kind this world simulates.
+        """
+        return entities.Bird(self, x, y)
+
+    def draw(self, alpha=1.0):
+        """
+        Draws the world, with everyone alpha of the way from where they were before the last integrate() to where
+        they are now; harness.run() uses this to render smoothly between fixed-rate simulation ticks.
+        """
+        # draw the goals, if present
+        for team in self.teams:
+            if hasattr(team, 'goal_sprite'):
+                team.goal_sprite.draw()
+
+        # bring the birds' vertices up to date with the simulation state
+        self.bird_renderer.draw(self, alpha)
+
+        # and draw the boids, of course!
+        self.batch.draw()
+
+        # and draw damage indicators on top
+        self.hit_markers.draw()
+        self.hit_marker_batch.draw()
+
+        # and move the damage indicators up + fade them out
+        self.hit_markers.advance()
+
+    def update(self):
+        # compute collision sets for all entities
+        self._calc_collisions()
+
+        # let the controllers that can think for their whole team at once do so up front
+        batched = self._think_batches()
+
+        # once we've computed all the neighbor/collision sets, it's time to update each ent
+        living = [me for me in self.ents if not me.dead]
+        for me in living:
+            # --------------------------
+            # --- entity thinking
+            # --------------------------
+
+            # computes the entity's acceleration, mostly, and usually using a controller
+            if me.team not in batched:
+                me.update()
+
+            # decrement counters, etc.
+            if me.damage_debounce > 0:
+                me.damage_debounce -= 1
+
+        # --------------------------
+        # --- collision response
+        # --------------------------
+
+        self._collide()
+
+        # --------------------------
+        # --- death response
+        # --------------------------
+
+        # if we just died, tell our controller (the renderer makes us sad and gray)
+        for me in living:
+            if me.dead:
+                me.controller.dead(me)
+
+    def getDrawState(self):
+        """
+        Returns everyone's positions, velocities, health and damage debounce counters as (n, 2), (n, 2), (n,) and (n,)
+        arrays, for the bird renderer and the team views.
+        """
+        ents = self.ents
+        return np.array([(me.x, me.y) for me in ents], dtype=float).reshape(-1, 2), \
+               np.array([(me.v.x, me.v.y) for me in ents], dtype=float).reshape(-1, 2), \
+               np.array([me.health for me in ents], dtype=int), \
+               np.array([me.damage_debounce for me in ents], dtype=int)
+
+    def integrate(self, dt):
+        # remember where everyone was, for draw() to interpolate from
+        if not self.headless:
+            self.prev_pos = [(ent.x, ent.y) for ent in self.ents]
+
+        # perform motion calculations and move our entities, totting up where each team's living members are and
+        # how they're moving as we go
+        motion = dict((team, (Vector2(), Vector2())) for team in self.teams)
+        for ent in self.ents:
+            ent.integrate(dt)
+            if not ent.dead:
+                pos_sum, vel_sum = motion.setdefault(ent.team, (Vector2(), Vector2()))
+                pos_sum += ent.pos
+                vel_sum += ent.v
+
+        for team, (pos_sum, vel_sum) in motion.iteritems():
+            team.setMotion(pos_sum, vel_sum)
+
+    # ====================================================
+    # === Internal Methods
+    # ====================================================
+
+    def _think_batches(self):
+        # run think_batch() for every team whose controller implements it, and return those teams
+        batched = set()
+        for team in self.teams:
+            if not thinks_in_batches(team.controller): continue
+            batched.add(team)
+
+            members = [me for me in team.members if not me.dead]
+            if not members: continue
+
+            accels = team.controller.think_batch(self._team_view(team, members))
+            for me, (ax, ay) in zip(members, accels.tolist()):
+                me.a = Vector2(ax * me.mass, ay * me.mass)
+
+        return batched
+
+    def _team_view(self, team, members):
+        # the TeamView handed to think_batch(), its neighbor arrays picked straight out of our neighborhoods
+        rows = np.array([me.index for me in members], dtype=int)
+        nbr_ptr, entries = self.neighborhoods.gather(rows)
+        nbr = self.neighborhoods
+        pos, vel, health, debounce = self.getDrawState()
+
+        return TeamView(team, members,
+                        pos=pos[rows], vel=vel[rows], health=health[rows].astype(float),
+                        mass=np.array([me.mass for me in members], dtype=float),
+                        nbr_ptr=nbr_ptr,
+                        nbr_dist=nbr.dist[entries],
+                        nbr_offset=nbr.offset[entries],
+                        nbr_vel=vel[nbr.index[entries]],
+                        nbr_friend=nbr.friend[entries])
+
+    def _collide(self):
+        # respond to every colliding pair once, from both birds' velocities at the start of the phase (as
+        # kernels.collision_response() does for ArrayWorld)
+        ents, collisions = self.ents, self.collisions
+        ptr, index, offsets = collisions.ptr.tolist(), collisions.index.tolist(), collisions.offset.tolist()
+
+        # what we need of everyone's velocity, worked out once rather than for each of their collisions, and who
+        # everyone's nearest collider is (the first in their row)
+        headings = [me.v.normalized() for me in ents]
+        speeds = [me.v.magnitude() for me in ents]
+        nearest = [index[ptr[i]] if ptr[i+1] > ptr[i] else -1 for i in xrange(len(ents))]
+
+        for i, me in enumerate(ents):
+            for e in xrange(ptr[i], ptr[i+1]):
+                # each pair is in both birds' rows; take it from the first bird's
+                j = index[e]
+                if j < i: continue
+                other = ents[j]
+
+                # push the two apart, along the line between them (across the world's edges, if need be)
+                push = Vector2(*offsets[e]).normalized() * values.COLLISION_REPULSE_MULT
+                me.v -= push
+                other.v += push
+
+                # and each is hurt by the other if that's its nearest collider, based on how alike their headings are
+                alike = headings[i].dot(headings[j])
+                if nearest[i] == j:
+                    self._hurt(me, alike, speeds[j])
+                if nearest[j] == i:
+                    self._hurt(other, alike, speeds[i])
+
+    def _hurt(self, me, alike, speed):
+        # damage an entity by a collision with one heading alike (the dot product of their normalized velocities) at
+        # the given speed
+
+        # only damage us if we're not already reeling from an earlier attack
+        if me.damage_debounce > 0: return
+
+        # DAMAGE!!!
+        dmg_val = max(int((alike + 1.0) * speed * values.COLLISION_DAMAGE_MULT + values.COLLISION_DAMAGE_STATIC), 0)
+
+        # make a hit indication to float upward
+        self._add_hit_marker(me.x, me.y, dmg_val)
+
+        # apply damage (through our team, which keeps track of its total health)
+        me.team.hurt(me, dmg_val)
+        me.damage_debounce = values.DAMAGE_DEBOUNCE_MAX
+
+    def _add_hit_marker(self, x, y, dmg_val):
+        # make a damage indication that floats upward from (x,y); headless worlds don't draw any
+        if self.headless: return
+
+        # scatter = (self.fx_random.randint(-3,3), self.fx_random.randint(-3,3))
+        scatter = (self.fx_random.randint(-1,1),1)
+        self.hit_markers.add(x, y, dmg_val, scatter)
+
+    def _calc_collisions(self):
+        # only living entities can be neighbors/colliders
+        ents = self.ents
+        living = np.array([me.index for me in ents if not me.dead], dtype=int)
+        team_id = np.array([me.team_id for me in ents], dtype=int)
+        self._find_neighborhoods(living, team_id, [(ents[i].x, ents[i].y) for i in living])
+
+    def _find_neighborhoods(self, living, team_id, points):
+        # fill in everyone's neighborhoods and collisions, given the indices of the living entities, everyone's team
+        # ids and the living entities' (x, y)
+        ents = self.ents
+
+        # have the broadphase find every pair of entities within range of each other (on the torus)
+        radius = max(values.VISION_RADIUS, values.COLLISION_DIST)
+        found = np.array(self.broadphase.pairs(points, radius), dtype=float).reshape(-1, 5)
+        first, second = living[found[:, 0].astype(int)], living[found[:, 1].astype(int)]
+
+        # each pair is an entry in both its entities' neighborhoods, with the offset pointing away from the owner
+        owner, index = np.concatenate([first, second]), np.concatenate([second, first])
+        dist = np.concatenate([found[:, 4], found[:, 4]])
+        offset = np.concatenate([found[:, 2:4], -found[:, 2:4]])
+        friend = team_id[owner] == team_id[index]
+
+        # sorted by dist asc (ties broken by entity order, as the old all-pairs loop did), keeping only the nearest
+        # neighbors if they're capped; only enemies collide
+        near = dist <= values.VISION_RADIUS
+        self.neighborhoods = Neighborhoods.from_entries(ents, owner[near], index[near], dist[near], offset[near],
+                                                        friend[near], k=self.max_neighbors)
+
+        colliding = (dist <= values.COLLISION_DIST) & ~friend
+        self.collisions = Neighborhoods.from_entries(ents, owner[colliding], index[colliding], dist[colliding],
+                                                     offset[colliding], friend[colliding])
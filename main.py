@@ -1,52 +1,52 @@
-from controllers.boidy_sigmoid import BoidySigmoidController
-from controllers.dummyfollow import DummyFollowController
-from controllers.boidy import BoidyController
-from controllers.state import StateController
-
-from framework import harness
-from framework.team import Team
-
-#number of first to 3 rounds
-numberOfRounds = 20
-
-#first to this number wins
-bestOf = 3
-
-winner = []
-teams = [
-    Team(name="boids!",  controller=StateController(0)),
-    Team(name="robots?", controller=StateController(0))
-]
-
-#run this numberOfRounds times
-currNumRounds = 0
-while currNumRounds < numberOfRounds:
-    print "round ", currNumRounds
-    currNumRounds += 1
-
-    #first to bestOf wins
-    team0StartScore = teams[0].score
-    team1StartScore = teams[1].score
-
-    while team0StartScore +bestOf > teams[0].score and team1StartScore +bestOf > teams[1].score:
-        #battle
-        winner = harness.run(width=800, height=600,
-            teams=teams,
-            per_team=8, timelimit=60, end_on_victory=True)
-        if winner:
-            print "Winner: %s, health %d, score %d" % (winner[0].name, winner[1], winner[0].score)
-
-    #now we have the winner, replace the other team
-    if teams[0].score - team0StartScore < teams[1].score - team1StartScore:
-        teams[0] = Team(name="boids!",  controller=StateController(0))
-        print "robots wins!"
-    else:
-        teams[1] = Team(name="robots?",  controller=StateController(0))
-        print "boids wins"
-
-outputFile = open('C:\Users\Natalie\Documents\cs275\\tournamentOutput.txt', 'w')
-outputStr = "Overall Winner:" + winner[0].controller.__str__()
-outputFile.write(outputStr)
-
-
-
+from controllers.boidy_sigmoid import BoidySigmoidController
+from controllers.dummyfollow import DummyFollowController
+from controllers.boidy import BoidyController
+from controllers.state import StateController
+
+from framework import evolution, tournament
+from framework.team import Team
+
+#set this to watch every match in a window (one at a time) instead of simulating them headless in parallel
+watchMatches = False
+
+#number of worker processes to simulate matches with (None means one per CPU)
+workers = None
+
+#number of first to 3 rounds
+numberOfRounds = 20
+
+#first to this number wins
+bestOf = 3
+
+teamNames = ["boids!", "robots?"]
+
+#set this to evolve a population of state tables instead of playing the tournament
+evolveTables = False
+
+#number of generations, genomes per generation and matches each genome plays per generation when evolving
+numberOfGenerations = 50
+populationSize = 32
+matchesPerGenome = 16
+
+def makeChallenger(index):
+    #a fresh random team to take the place of the loser at index
+    return Team(name=teamNames[index], controller=StateController(0))
+
+#the guard keeps worker processes (which import this module on some platforms) from starting tournaments of their own
+if __name__ == '__main__':
+    if evolveTables:
+        best, fitness = evolution.run(numberOfGenerations, size=populationSize, matches=matchesPerGenome,
+            processes=workers,
+            width=800, height=600, per_team=8, timelimit=60, end_on_victory=True)
+        champion = StateController.from_genome(best)
+    else:
+        teams = [makeChallenger(0), makeChallenger(1)]
+
+        winner = tournament.run(teams, makeChallenger, numberOfRounds, bestOf,
+            processes=workers, watch=watchMatches,
+            width=800, height=600, per_team=8, timelimit=60, end_on_victory=True)
+        champion = winner[0].controller
+
+    outputFile = open('C:\Users\Natalie\Documents\cs275\\tournamentOutput.txt', 'w')
+    outputStr = "Overall Winner:" + champion.__str__()
+    outputFile.write(outputStr)
\ No newline at end of file
@@ -0,0 +1,41 @@
+import unittest
+import numpy as np
+from controllers.dummyfollow import DummyFollowController
+from framework import match, values
+from framework.arrayworld import ArrayWorld
+from framework.team import Team
+from framework.world import World
+
+class ArrayWorldDrawStateTest(unittest.TestCase):
+    def setUp(self):
+        self.world = ArrayWorld(200, 150, headless=True, seed=1)
+        match.populate(self.world, [Team(name="a", controller=DummyFollowController()),
+                                    Team(name="b", controller=DummyFollowController())], 3)
+
+    def test_overrides_world(self):
+        self.assertIsNot(ArrayWorld.getDrawState.__func__, World.getDrawState.__func__)
+
+    def test_returns_the_arrays(self):
+        world = self.world
+        world.update()
+        world.integrate(values.SIM_DT)
+
+        pos, vel, health, debounce = world.getDrawState()
+        self.assertIs(pos.base, world._pos)
+        self.assertIs(vel.base, world._vel)
+        self.assertEqual(pos.shape, (6, 2))
+        self.assertEqual(vel.shape, (6, 2))
+        self.assertEqual(health.shape, (6,))
+        self.assertEqual(debounce.shape, (6,))
+
+    def test_matches_the_entities(self):
+        # the same state World gathers from its entities one by one
+        world = self.world
+        world.update()
+        world.integrate(values.SIM_DT)
+
+        for mine, gathered in zip(world.getDrawState(), World.getDrawState(world)):
+            np.testing.assert_array_equal(mine, gathered)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+from controllers.state import StateController
+from framework import ensemble, headless
+from framework.arrayworld import ArrayWorld
+from framework.team import Team
+
+MATCH = dict(width=300, height=250, per_team=6, timelimit=10, end_on_victory=True)
+
+def make_teams():
+    return [Team(name="boids!", controller=StateController(1)),
+            Team(name="robots?", controller=StateController(1))]
+
+class EnsembleSeedTest(unittest.TestCase):
+    def play_alone(self, seed):
+        team, health = headless.run(teams=make_teams(), randseed=seed, world_class=ArrayWorld, **MATCH)
+        return team.name, health
+
+    def test_each_world_plays_its_own_seed(self):
+        # every world of an ensemble plays out exactly like a headless ArrayWorld match on its seed, whichever other
+        # worlds share its batch and in whatever order
+        seeds = [11, 12, 13, 14]
+        alone = dict((seed, self.play_alone(seed)) for seed in seeds)
+
+        for batch in ([11], [14, 11], [11, 12, 13], [13, 12, 11, 14]):
+            winners = ensemble.run(teams=make_teams(), seeds=batch, **MATCH)
+            self.assertEqual([(team.name, health) for team, health in winners], [alone[seed] for seed in batch])
+
+if __name__ == '__main__':
+    unittest.main()
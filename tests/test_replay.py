@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from controllers.state import StateController
+from framework import headless, match, values
+from framework.arrayworld import ArrayWorld
+from framework.replay import CHUNK_FRAMES, Recorder, Replay
+from framework.team import Team
+from framework.world import World
+
+MATCH = dict(width=300, height=250, per_team=5, timelimit=3, world_class=ArrayWorld)
+
+def make_teams():
+    return [Team(name="boids!", controller=StateController(1)),
+            Team(name="robots?", controller=StateController(1))]
+
+class ReplaySeedTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_any_seed_is_recorded(self):
+        # a match played from any seed (-1) records the seed it actually played from, which plays it out again
+        first = os.path.join(self.dir, 'first.rep')
+        headless.run(teams=make_teams(), randseed=-1, replay=first, **MATCH)
+        seed = Replay(first).seed
+        self.assertIsInstance(seed, int)
+        self.assertNotEqual(seed, -1)
+
+        again = os.path.join(self.dir, 'again.rep')
+        headless.run(teams=make_teams(), randseed=seed, replay=again, **MATCH)
+        self.assertTrue(np.array_equal(Replay(first).frames, Replay(again).frames))
+
+class ReplayRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def round_trip(self, world_class):
+        # play a match long enough to span more than one chunk, keeping the world's state after every tick, then
+        # read it back and check every frame against what the world held
+        world = world_class(MATCH['width'], MATCH['height'], headless=True, seed=5)
+        match.populate(world, make_teams(), MATCH['per_team'])
+
+        path = os.path.join(self.dir, 'match.rep')
+        recorder = Recorder(path, world, seed=5, dt=values.SIM_DT)
+        states = []
+        for tick in xrange(CHUNK_FRAMES + 44):
+            if tick:
+                world.update()
+                world.integrate(values.SIM_DT)
+            recorder.record(values.SIM_DT if tick else 0.0)
+            states.append([np.array(a, copy=True) for a in world.getDrawState()[:3]])
+        recorder.close()
+
+        replay = Replay(path)
+        self.assertEqual(len(replay), len(states))
+        self.assertEqual((replay.width, replay.height), (MATCH['width'], MATCH['height']))
+        self.assertEqual((replay.seed, replay.dt), (5, values.SIM_DT))
+
+        # positions are quantized to 1/65535 of the world's size (and wrapped into it), velocities stored as half
+        # floats
+        size = np.array([MATCH['width'], MATCH['height']], dtype=float)
+        step = size / 65535.0
+        last_health = states[0][2]
+        for i, (pos, vel, health) in enumerate(states):
+            self.assertEqual(replay[i]['tick'], i)
+            error = (replay.positions(i) - pos + size / 2) % size - size / 2
+            self.assertTrue((abs(error) <= step).all(), i)
+            np.testing.assert_allclose(replay.velocities(i), vel, rtol=1e-3, atol=1e-3)
+            np.testing.assert_array_equal(replay.health(i), health)
+            np.testing.assert_array_equal(replay[i]['damage'], last_health - health)
+            last_health = health
+
+        # the match should have been eventful enough to test the health and damage fields
+        self.assertTrue((states[-1][2] < states[0][2]).any())
+
+    def test_world(self):
+        self.round_trip(World)
+
+    def test_arrayworld(self):
+        self.round_trip(ArrayWorld)
+
+if __name__ == '__main__':
+    unittest.main()
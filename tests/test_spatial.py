@@ -0,0 +1,84 @@
+import random
+import unittest
+from framework import spatial
+
+WIDTH, HEIGHT = 300, 200
+RADIUS = 30.0
+
+def scatter(rng, n):
+    # anywhere in the world
+    return [(rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT)) for i in xrange(n)]
+
+def corner(rng, n):
+    # clustered around a corner, so most close pairs are only close across one edge or both
+    return [(rng.uniform(-RADIUS, RADIUS) % WIDTH, rng.uniform(-RADIUS, RADIUS) % HEIGHT) for i in xrange(n)]
+
+def edges(rng, n):
+    # strung along the left/right and top/bottom edges, some exactly on them, some stacked on top of each other
+    points = []
+    for i in xrange(n):
+        if i % 2:
+            points.append((rng.choice([0.0, rng.uniform(0, 5), WIDTH - rng.uniform(0, 5)]), rng.uniform(0, HEIGHT)))
+        else:
+            points.append((rng.uniform(0, WIDTH), rng.choice([0.0, rng.uniform(0, 5), HEIGHT - rng.uniform(0, 5)])))
+    return points + points[:n // 10]
+
+class BroadphaseTest(unittest.TestCase):
+    """
+    Every broadphase should find exactly the pairs BruteForce does, down to the last bit of each offset and distance.
+    """
+
+    def broadphases(self):
+        return [spatial.SpatialHash(WIDTH, HEIGHT),
+                spatial.SpatialHash(WIDTH, HEIGHT, cell_size=RADIUS / 2),
+                spatial.SweepAndPrune(WIDTH, HEIGHT),
+                spatial.QuadTree(WIDTH, HEIGHT),
+                spatial.QuadTree(WIDTH, HEIGHT, leaf_size=1),
+                spatial.VerletList(WIDTH, HEIGHT),
+                spatial.VerletList(WIDTH, HEIGHT, broadphase=spatial.SweepAndPrune(WIDTH, HEIGHT))]
+
+    def assertSamePairs(self, broadphase, points, radius=RADIUS):
+        expected = sorted(spatial.BruteForce(WIDTH, HEIGHT).pairs(points, radius))
+        self.assertEqual(sorted(broadphase.pairs(points, radius)), expected, type(broadphase).__name__)
+
+    def test_scenes(self):
+        rng = random.Random(3)
+        for scene in (scatter, corner, edges):
+            for n in (0, 1, 2, 40, 150):
+                points = scene(rng, n)
+                for broadphase in self.broadphases():
+                    self.assertSamePairs(broadphase, points)
+
+    def test_radius(self):
+        rng = random.Random(4)
+        points = corner(rng, 80) + scatter(rng, 80)
+        for radius in (0.0, 5.0, 100.0, WIDTH):
+            for broadphase in self.broadphases():
+                self.assertSamePairs(broadphase, points, radius)
+
+    def test_verlet_ticks(self):
+        # the same list queried tick after tick as everyone moves, wrapping around the edges as they go, and as
+        # some of them die
+        rng = random.Random(5)
+        points = corner(rng, 60) + scatter(rng, 60)
+        heading = [(rng.uniform(-2, 2), rng.uniform(-2, 2)) for p in points]
+        verlet = spatial.VerletList(WIDTH, HEIGHT)
+
+        for tick in xrange(60):
+            points = [((x + dx) % WIDTH, (y + dy) % HEIGHT) for (x, y), (dx, dy) in zip(points, heading)]
+            if tick % 15 == 14:
+                builds = verlet.builds
+                dead = set(rng.sample(xrange(len(points)), 7))
+                points = [p for i, p in enumerate(points) if i not in dead]
+                heading = [h for i, h in enumerate(heading) if i not in dead]
+                self.assertSamePairs(verlet, points)
+                self.assertEqual(verlet.builds, builds + 1)
+            else:
+                self.assertSamePairs(verlet, points)
+
+        # the candidates should have been reused on most ticks, rebuilt only as everyone moved far enough or died
+        self.assertLess(verlet.builds, 40)
+        self.assertGreater(verlet.builds, 4)
+
+if __name__ == '__main__':
+    unittest.main()